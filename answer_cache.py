@@ -0,0 +1,224 @@
+import math
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, Optional, Set, Tuple
+
+from textproc import KEY_WORDS, content_words
+
+# =========================
+# Answer Cache للأسئلة المتكررة (FAQ)
+# =========================
+# - المفتاح: الكلمات المهمة بعد التطبيع وشيل الـ stopwords، بنفس ترتيبها.
+#   أدوات السؤال والنفي بتفضل في المفتاح ("who founded" ≠ "when founded"، "not hiring" ≠ "hiring")
+#   ("ابي اطلب بوت" و "اريد اطلب بوت" → نفس المفتاح "اطلب بوت")
+# - near-duplicate: cosine similarity على vectors من char 3-grams (hashed) للمفتاح لازم تعدي
+#   min_similarity، وكمان كل كلمة تطابق اللي قصادها (same_question): أدوات السؤال والنفي
+#   بالظبط والباقي غلطة إملائية بسيطة بس
+# - inverted index من الـ n-gram للمفاتيح → بنقارن بس مع الأسئلة اللي بتشارك n-grams
+# - TTL + LRU + invalidate() لما قاعدة المعلومات تتغير
+
+
+# أقل تشابه بين كلمتين قصاد بعض (difflib ratio): "order"/"ordr" و "price"/"prices" بيعدوا،
+# "hiring"/"firing" لأ
+MIN_WORD_SIMILARITY = 0.85
+
+
+def canonical_key(question: str) -> str:
+    # dict.fromkeys: شيل التكرار مع الحفاظ على الترتيب
+    return " ".join(dict.fromkeys(content_words(question)))
+
+
+def same_question(a: str, b: str, min_word_similarity: float = MIN_WORD_SIMILARITY) -> bool:
+    """
+    مفتاحين لنفس السؤال: نفس عدد الكلمات، وكل كلمة تطابق اللي قصادها.
+    """
+    a_words, b_words = a.split(), b.split()
+    if len(a_words) != len(b_words):
+        return False
+    for x, y in zip(a_words, b_words):
+        if x == y:
+            continue
+        if x in KEY_WORDS or y in KEY_WORDS:
+            return False
+        if SequenceMatcher(None, x, y).ratio() < min_word_similarity:
+            return False
+    return True
+
+
+def ngram_vector(key: str) -> Dict[int, float]:
+    """
+    vector مطبّع (L2) من char 3-grams، الـ n-gram بيتحول لرقم بـ crc32.
+    """
+    padded = "_" + key.replace(" ", "_") + "_"
+    counts: Dict[int, float] = {}
+    for i in range(len(padded) - 2):
+        h = zlib.crc32(padded[i:i + 3].encode("utf-8"))
+        counts[h] = counts.get(h, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {k: v / norm for k, v in counts.items()}
+
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+@dataclass
+class CacheEntry:
+    question: str
+    key: str
+    vector: Dict[int, float]
+    answer: str
+    version: str
+    created_at: float
+    gen_latency: float
+    hits: int = 0
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    exact_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    saved_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "exact_hits": self.exact_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "saved_seconds": self.saved_seconds,
+        }
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        max_entries: int = 2000,
+        ttl_seconds: float = 6 * 3600,
+        min_similarity: float = 0.85,
+        version: str = "",
+        clock=time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_similarity = min_similarity
+        self.version = version
+        self.clock = clock
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._index: Dict[int, Set[str]] = {}
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---------- internal ----------
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for gram in entry.vector:
+            bucket = self._index.get(gram)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._index[gram]
+
+    def _expired(self, entry: CacheEntry, now: float) -> bool:
+        return entry.version != self.version or now - entry.created_at > self.ttl_seconds
+
+    def _find(self, key: str, now: float) -> Tuple[Optional[CacheEntry], bool]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if not self._expired(entry, now):
+                return entry, True
+            self._remove(key)
+            self.stats.expirations += 1
+
+        vector = ngram_vector(key)
+        candidates: Set[str] = set()
+        for gram in vector:
+            candidates |= self._index.get(gram, set())
+
+        best, best_score = None, self.min_similarity
+        for cand_key in candidates:
+            cand = self._entries[cand_key]
+            score = cosine(vector, cand.vector)
+            if score >= best_score and same_question(key, cand_key):
+                best, best_score = cand, score
+        if best is not None and self._expired(best, now):
+            self._remove(best.key)
+            self.stats.expirations += 1
+            return None, False
+        return best, False
+
+    # ---------- API ----------
+
+    def get(self, question: str) -> Optional[str]:
+        key = canonical_key(question)
+        if not key:
+            return None
+        now = self.clock()
+        entry, exact = self._find(key, now)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(entry.key)
+        entry.hits += 1
+        self.stats.hits += 1
+        if exact:
+            self.stats.exact_hits += 1
+        self.stats.saved_seconds += entry.gen_latency
+        return entry.answer
+
+    def put(self, question: str, answer: str, gen_latency: float = 0.0) -> None:
+        key = canonical_key(question)
+        if not key:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        entry = CacheEntry(
+            question=question,
+            key=key,
+            vector=ngram_vector(key),
+            answer=answer,
+            version=self.version,
+            created_at=self.clock(),
+            gen_latency=gen_latency,
+        )
+        self._entries[key] = entry
+        for gram in entry.vector:
+            self._index.setdefault(gram, set()).add(key)
+        self.stats.stores += 1
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+
+    def invalidate(self, version: Optional[str] = None) -> None:
+        """
+        يمسح الكاش كله. بيتنادى لما قاعدة المعلومات تتغير (version جديدة).
+        """
+        if version is not None:
+            self.version = version
+        self._entries.clear()
+        self._index.clear()
+        self.stats.invalidations += 1
@@ -0,0 +1,115 @@
+"""
+مقارنة الذاكرة ووقت التشغيل بين الوضع العادي و lean gateway mode.
+
+الاستخدام (محتاج .env فيه DISCORD_TOKEN و GEMINI_API_KEY):
+    python bench_memory.py --settle 60 --runs 2
+
+كل run بيشغّل bot.py في process منفصلة، بيستنى سطر "Logged in" (وقت التشغيل)،
+وبعدين بيستنى --settle ثواني (الـ chunking والكاش بيكبروا بعد الـ ready) ويقيس الـ RSS
+وبعدين يقفل البوت. البوت ما بيتعملوش import هنا.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+READY_MARKER = "Logged in as"
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    try:
+        import psutil  # optional
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def run_once(lean: bool, settle: float, timeout: float) -> Dict[str, Optional[float]]:
+    env = dict(os.environ, LEAN_GATEWAY="1" if lean else "0", PYTHONUNBUFFERED="1")
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "bot.py"],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    ready = threading.Event()
+
+    def _read():
+        for line in proc.stdout:
+            if READY_MARKER in line:
+                ready.set()
+
+    threading.Thread(target=_read, daemon=True).start()
+
+    result: Dict[str, Optional[float]] = {"startup": None, "rss_ready": None, "rss_settled": None}
+    try:
+        if not ready.wait(timeout):
+            print(f"⚠️ bot did not become ready within {timeout:.0f}s")
+            return result
+        result["startup"] = time.perf_counter() - started
+        result["rss_ready"] = rss_mb(proc.pid)
+        time.sleep(settle)
+        result["rss_settled"] = rss_mb(proc.pid)
+        return result
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _avg(values: List[Optional[float]]) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+def _fmt(value: Optional[float], unit: str) -> str:
+    return f"{value:.1f}{unit}" if value is not None else "-"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare RSS / startup time: default vs lean gateway mode")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--settle", type=float, default=60.0, help="ثواني بعد الـ ready قبل القياس النهائي")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    rows = []
+    for lean in (False, True):
+        mode = "lean" if lean else "default"
+        runs = []
+        for i in range(args.runs):
+            print(f"[{mode}] run {i + 1}/{args.runs} ...")
+            runs.append(run_once(lean, args.settle, args.timeout))
+        rows.append((
+            mode,
+            _avg([r["startup"] for r in runs]),
+            _avg([r["rss_ready"] for r in runs]),
+            _avg([r["rss_settled"] for r in runs]),
+        ))
+
+    print(f"\n{'mode':<8} {'startup':>9} {'RSS@ready':>11} {'RSS@settled':>12}")
+    for mode, startup, ready, settled in rows:
+        print(f"{mode:<8} {_fmt(startup, 's'):>9} {_fmt(ready, 'MB'):>11} {_fmt(settled, 'MB'):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1009 @@
+"""
+مكتبة GP Team Assistant الأساسية (من غير Discord).
+
+فيها الموديلات والـ router وتاريخ المحادثة والـ AutoMod وقاعدة المعلومات والكاش وبناء
+البرومبت والتوليد. الـ import هنا ما بيعملش أي حاجة تقيلة ولا محتاج tokens:
+- Gemini بيتعمله import + configure مع أول طلب بس (get_model)
+- قاعدة المعلومات بتتحمّل مع أول استخدام (current_knowledge)
+- الـ off-topic classifier بيتحمّل مع أول سؤال
+فينفع يتعمله import من البوت أو من worker processes أو سكريبتات الـ benchmark.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from scheduler import PriorityScheduler
+from intents import quick_reply
+from textproc import detect_language, dominant_language
+from offtopic import OffTopicClassifier, refusal_reply
+from answer_cache import AnswerCache
+from router import ModelRouter, Route, build_generation_config, usage_tokens
+from knowledge import DEFAULT_EXCLUDE_TAGS, compile_file, load_knowledge
+from state import history_key, open_state
+from executors import executor, executor_stats, run_blocking
+from stages import run_stage, stage_pool
+from metrics import Family, counter, observe_stage, register_collector, stage_timer
+
+# =========================
+# إعداد Gemini (lazy)
+# =========================
+# موديل سريع ومناسب للشات
+LITE_MODEL_NAME  = "gemini-flash-lite-latest"  # للأسئلة البسيطة
+FLASH_MODEL_NAME = "gemini-flash-latest"   # للشات
+PRO_MODEL_NAME   = "gemini-pro-latest"     # للأمان / AutoMod + الأسئلة الصعبة
+
+# الرد لما Gemini يفشل (exception أو الرد ما اتقراش)
+AI_ERROR_REPLY = "❌ An error occurred while responding to the AI, please try again later."
+# الرد لما Gemini يرجع من غير نص (اتوقف للـ safety / RECITATION أو فاضي)
+AI_EMPTY_REPLY = "⚠️ حدث خطا - An Error occurred\nPlease Try Again."
+AI_FAILURE_REPLIES = (AI_ERROR_REPLY, AI_EMPTY_REPLY)
+
+_genai = None
+_models: Dict[str, object] = {}
+_models_lock = threading.Lock()
+
+
+def get_model(model_name: str):
+    """
+    GenerativeModel للاسم ده (نفس الاسم = نفس الـ object).
+    أول نداء بيعمل import لـ google.generativeai و configure بـ GEMINI_API_KEY.
+    """
+    global _genai
+    with _models_lock:
+        model = _models.get(model_name)
+        if model is not None:
+            return model
+        if _genai is None:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("⚠️ متغير GEMINI_API_KEY غير موجود في ملف .env")
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            _genai = genai
+        model = _models[model_name] = _genai.GenerativeModel(model_name)
+        return model
+
+
+# =========================
+# Model Router: كل طلب شات بيروح للموديل المناسب لصعوبته
+# =========================
+# flash و pro موديلات تفكير: السقف شامل توكنز التفكير فلازم يبقى واسع
+# (طول الرد فيهم بيتحدد من البرومبت، مش من سقف الـ profile)
+CHAT_ROUTES = [
+    Route("lite", LITE_MODEL_NAME, max_score=1.0,
+          generation_config={"max_output_tokens": 512, "temperature": 0.6}),
+    Route("flash", FLASH_MODEL_NAME, max_score=3.5, thinking=True,
+          generation_config={"max_output_tokens": 4096, "temperature": 0.7}),
+    Route("pro", PRO_MODEL_NAME, max_score=float("inf"), thinking=True,
+          generation_config={"max_output_tokens": 8192, "temperature": 0.7}),
+]
+MODEL_ROUTER = ModelRouter(CHAT_ROUTES)
+
+# =========================
+# طول الرد حسب نية السؤال (generation_config لكل intent)
+# =========================
+# البرومبت بيطلب 2–5 سطور افتراضيًا → السقف هنا بيضمن ده فعليًا،
+# وطلب التفاصيل ("اشرح بالتفصيل" / "explain in detail") بيرفع السقف.
+# السقف بيتطبق على route الـ lite بس (مفيهوش تفكير)؛ stop_sequences على الكل.
+# stop_sequences بتمنع الموديل يكمل المحادثة ويألف رسالة "USER:" جديدة.
+_STOP_SEQUENCES = ["\nUSER:", "\n[CONVERSATION"]
+
+GENERATION_PROFILES = {
+    "greeting":  {"max_output_tokens": 120,  "stop_sequences": _STOP_SEQUENCES},
+    "thanks":    {"max_output_tokens": 120,  "stop_sequences": _STOP_SEQUENCES},
+    "emoji":     {"max_output_tokens": 120,  "stop_sequences": _STOP_SEQUENCES},
+    "pricing":   {"max_output_tokens": 300,  "stop_sequences": _STOP_SEQUENCES},
+    "ordering":  {"max_output_tokens": 400,  "stop_sequences": _STOP_SEQUENCES},
+    "complaint": {"max_output_tokens": 500,  "stop_sequences": _STOP_SEQUENCES},
+    "general":   {"max_output_tokens": 400,  "stop_sequences": _STOP_SEQUENCES},
+    "detailed":  {"max_output_tokens": 1536, "stop_sequences": _STOP_SEQUENCES},
+}
+
+
+# =========================
+# تاريخ المحادثة
+# =========================
+
+# (channel_id, user_id) -> List[dict(role, content)]
+MAX_HISTORY_MESSAGES = 8  # عدد الرسائل (user+assistant) اللي نحتفظ بيها لكل محادثة
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def shared_state():
+    """
+    الـ backend بتاع التاريخ والـ rate limits والإعدادات (STATE_BACKEND، الافتراضي memory).
+    بيتفتح مع أول استخدام.
+    """
+    global _state
+    with _state_lock:
+        if _state is None:
+            _state = open_state()
+        return _state
+
+
+async def run_state(fn, *args, **kwargs):
+    """
+    عملية على الـ state backend من غير ما توقف الـ event loop: SQLite (BEGIN IMMEDIATE بيستنى
+    الـ lock لحد 10 ثواني) و Redis (network) بيتنفذوا في executor "state"، و memory على طول.
+    """
+    if not shared_state().shared:
+        return fn(*args, **kwargs)
+    return await run_blocking("state", fn, *args, **kwargs)
+
+
+def add_to_history(channel_id: int, user_id: int, entries: List[Dict[str, str]]) -> None:
+    """
+    entries: [{"role": "user" | "assistant", "content": ...}]
+    """
+    # القصّ لآخر MAX_HISTORY_MESSAGES بيحصل جوه الـ backend في نفس العملية
+    shared_state().append_history(history_key(channel_id, user_id), entries, MAX_HISTORY_MESSAGES)
+
+
+def get_history(channel_id: int, user_id: int) -> List[Dict[str, str]]:
+    return shared_state().get_history(history_key(channel_id, user_id))
+
+
+def reset_history(channel_id: int, user_id: int) -> None:
+    shared_state().clear_history(history_key(channel_id, user_id))
+
+
+# =========================
+# أولويات طلبات Gemini
+# =========================
+# رقم أقل = أولوية أعلى
+AI_PRIORITY_CLASSES = {
+    "staff": 0,
+    "premium": 1,
+    "interactive": 2,   # /chat (اليوزر مستني على interaction متأجل)
+    "default": 3,       # رسائل قناة الذكاء + AutoMod
+    "background": 4,    # تسخين الكاش
+}
+AI_AGING_SECONDS = 10      # كل 10 ثواني انتظار = درجة أولوية
+
+# scheduler لكل workload (moderation / chat) وسعته = حجم الـ executor بتاعه (EXECUTOR_SIZES):
+# - موجة AutoMod بتستنى في طابورها وما تاخدش slots الشات
+# - الـ slot = thread فاضي، فالطلب ما يمسكش slot وهو لسه مستني thread في الـ executor
+AI_WORKLOADS = ("moderation", "chat")
+
+_ai_schedulers: Dict[str, PriorityScheduler] = {}
+
+
+def ai_scheduler(workload: str) -> PriorityScheduler:
+    scheduler = _ai_schedulers.get(workload)
+    if scheduler is None:
+        scheduler = _ai_schedulers[workload] = PriorityScheduler(
+            AI_PRIORITY_CLASSES,
+            max_concurrency=executor(workload).max_workers,
+            aging_seconds=AI_AGING_SECONDS
+        )
+    return scheduler
+
+
+def ai_scheduler_stats() -> Dict[str, Dict[str, dict]]:
+    # workload -> class -> stats
+    return {workload: ai_scheduler(workload).stats() for workload in AI_WORKLOADS}
+
+
+async def run_model_call(workload: str, fn):
+    """
+    زي run_blocking لطلب Gemini جوه slot من ai_scheduler(workload).
+    الطلب اللي بدأ في thread ما بيتلغيش، فلو الـ task اتلغت (الرسالة اتمسحت / اتعدلت)
+    بنستنى الطلب يخلص ونرمي نتيجته قبل ما نسيب الـ slot → الـ slots عمرها ما تعدي
+    الـ threads الفاضية. لو لسه ما بدأش في الـ executor بيتلغي على طول.
+    """
+    future = executor(workload).submit(fn)
+    waiter = asyncio.wrap_future(future)
+    try:
+        return await asyncio.shield(waiter)
+    except asyncio.CancelledError:
+        if not future.cancel():
+            try:
+                await waiter
+            except Exception:
+                pass
+        raise
+
+
+# =========================
+# AutoMod
+# =========================
+# لو حصل أي خطأ → نرجّع إنها مش مخالفة عشان ما نظلمش حد
+SAFE_MODERATION_RESULT = {
+    "is_violation": False,
+    "category": "none",
+    "severity": "low",
+    "recommended_action": "none",
+    "reason": "",
+}
+
+
+def build_moderation_prompt(content: str) -> str:
+    content = content.strip()
+    if len(content) > 800:
+        content = content[:800]
+    return f"""
+You are an advanced Discord AutoMod AI for a big Arabic/English community.
+
+Your job:
+- Detect ONLY real, clear rule breaking:
+  - insults & heavy swearing
+  - hate speech
+  - NSFW / sexual content
+  - threats or inciting violence
+  - extreme harassment / bullying
+- DO NOT flag:
+  - normal arguments
+  - polite criticism
+  - jokes / friendly teasing
+  - light sarcasm
+If you are NOT clearly sure it's a violation → treat it as SAFE.
+
+Return ONLY ONE valid JSON object (no extra text) exactly in this format:
+
+{{
+  "is_violation": true/false,
+  "category": "insult|hate|nsfw|threat|spam|other|none",
+  "severity": "low|medium|high",
+  "recommended_action": "none|warn|timeout_15m|ban",
+  "reason": "short explanation in the same language of the user if possible"
+}}
+
+Message:
+\"\"\"{content}\"\"\"
+"""
+
+
+def response_text(resp) -> str:
+    raw = ""
+    if getattr(resp, "text", None):
+        raw = resp.text
+    elif getattr(resp, "candidates", None):
+        for c in resp.candidates:
+            parts = getattr(c, "content", None)
+            if parts and getattr(parts, "parts", None):
+                for p in parts.parts:
+                    if getattr(p, "text", None):
+                        raw += p.text
+    return raw.strip()
+
+
+def response_outcome(resp) -> str:
+    """
+    ok | blocked (البرومبت نفسه اترفض) | safety (الرد اتوقف: SAFETY / RECITATION / ...)
+    """
+    feedback = getattr(resp, "prompt_feedback", None)
+    if getattr(feedback, "block_reason", None):
+        return "blocked"
+    candidates = getattr(resp, "candidates", None)
+    if not candidates:
+        return "blocked" if feedback is not None else "ok"
+    for cand in candidates:
+        fr = getattr(cand, "finish_reason", None)
+        if getattr(fr, "name", fr) in (None, "STOP", 0, 1, "MAX_TOKENS", 2):
+            return "ok"
+    return "safety"
+
+
+def parse_moderation_result(raw: str) -> dict:
+    """
+    يطلع الـ JSON من رد الموديل (حتى لو حواليه كلام) ويرجعه بالشكل الثابت.
+    بيرمي exception لو مفيش JSON صالح.
+    """
+    json_str = raw
+    if not (json_str.startswith("{") and json_str.endswith("}")):
+        m = re.search(r"\{.*\}", raw, re.S)
+        if m:
+            json_str = m.group(0)
+
+    data = json.loads(json_str)
+
+    return {
+        "is_violation": bool(data.get("is_violation", False)),
+        "category": data.get("category", "none"),
+        "severity": data.get("severity", "low"),
+        "recommended_action": data.get("recommended_action", "none"),
+        "reason": data.get("reason", ""),
+    }
+
+
+async def ai_moderate_message(content: str, priority_class: str = "default") -> dict:
+    """
+    يستخدم gemini-pro-latest لتحليل الرسالة.
+    يرجّع dict بالشكل:
+    {
+      "is_violation": bool,
+      "category": "insult|hate|nsfw|threat|spam|other|none",
+      "severity": "low|medium|high",
+      "recommended_action": "none|warn|timeout_15m|ban",
+      "reason": "..."
+    }
+
+    مصمم إنه يكون حريص وما يظلمش:
+    لو مش متأكد 100% إنها مخالفة → يعتبرها SAFE.
+    """
+    moderation_prompt = build_moderation_prompt(content)
+
+    def _call():
+        return get_model(PRO_MODEL_NAME).generate_content(moderation_prompt)
+
+    try:
+        queued_at = time.perf_counter()
+        async with ai_scheduler("moderation").slot(priority_class):
+            observe_stage("queue_wait", time.perf_counter() - queued_at, PRO_MODEL_NAME)
+            with stage_timer("moderation_call", PRO_MODEL_NAME) as timer:
+                resp = await run_model_call("moderation", _call)
+                timer.outcome = response_outcome(resp)
+        # استخراج الـ JSON من رد الموديل → stage (ممكن تبقى في process pool)
+        with stage_timer("moderation_parse", PRO_MODEL_NAME):
+            return await run_stage("parse_moderation", response_text(resp))
+
+    except Exception as e:
+        print(f"[AI MOD ERROR] {e}")
+        return dict(SAFE_MODERATION_RESULT)
+
+
+# =========================
+# قاعدة معلومات GP Team
+# =========================
+
+# المصدر: knowledge/gp_team.md (أقسام + tags). بعد أي تعديل: python knowledge.py
+# البوت بيحمّل الـ snapshot المتجمّع جاهز، ولو قديم بيبنيه من المصدر مع تحذير.
+KNOWLEDGE_SOURCE_FILE = "knowledge/gp_team.md"
+KNOWLEDGE_SNAPSHOT_FILE = "knowledge/gp_team.compiled.json"
+# الافتراضي: أقسام "postprocess" (قواعد تنسيق بيطبقها postprocess.py على الرد)
+KNOWLEDGE_EXCLUDE_TAGS: List[str] = list(DEFAULT_EXCLUDE_TAGS)
+
+# Hot reload: الملف بيتراقب، وأي تعديل بيتبني في الخلفية ويتبدّل مرة واحدة
+KNOWLEDGE_WATCH_ENABLED = True
+KNOWLEDGE_WATCH_INTERVAL = 5.0     # ثواني بين كل فحص لتاريخ تعديل الملف
+KNOWLEDGE_RELOAD_DEBOUNCE = 1.0    # نستنى الملف يثبت (المحررات بتكتب على مراحل)
+
+# مين بيعمل إيه مع الـ hot reload (start_knowledge_watcher):
+KNOWLEDGE_WATCH_RELOAD = "reload"    # process واحدة: تبني المصدر وتحمّله
+KNOWLEDGE_WATCH_COMPILE = "compile"  # الـ gateway قدام AI workers: تبني الـ snapshot بس
+KNOWLEDGE_WATCH_LOAD = "load"        # AI worker: تحمّل الـ snapshot اللي الـ gateway بناه (من غير كتابة)
+
+
+def build_system_prompt(knowledge: str) -> str:
+    return (
+        "You are GP Team Assistant.\n"
+        "You have the following internal knowledge about GP Team:\n"
+        f"{knowledge}\n\n"
+        "Your ONLY job is to answer questions and inquiries about GP Team based on this knowledge.\n"
+        "If the user asks for anything not related to GP Team, clearly refuse and remind them that you are only for GP Team.\n"
+        "Exception: If the user only sends a short greeting or thanks "
+        "(for example: هلا، سلام، السلام عليكم، hi، hello، thanks، شكرا), "
+        "you MUST still reply with a short, friendly greeting or thanks, "
+        "and briefly remind them that you are the official GP Team assistant.\n"
+        "You MUST NOT refuse these simple greetings.\n"
+        "If the user sends only a simple positive emoji (❤️, 😀, 😅, 😂, 🙂, 🤝), "
+        "reply with a short friendly line and remind them you can help with GP Team questions.\n"
+        "Always answer in the same language the user uses (Arabic or English).\n"
+        "Keep your answers short and compact by default (2–5 lines) unless the user explicitly asks for more detail.\n"
+    )
+
+
+class KnowledgeBundle(NamedTuple):
+    """
+    كل اللي بيتبني من قاعدة المعلومات مرة واحدة. الطلب بياخد نسخة في أوله ويكمل بيها
+    حتى لو حصل reload في النص.
+    """
+    version: str
+    source_sha256: str
+    packs: Dict[str, str]
+    # باك لكل لغة (ar / en) + النص الكامل (mixed) للرسائل اللي فيها اللغتين
+    system_prompts: Dict[str, str]
+    loaded_at: float          # time.time()
+    build_seconds: float
+
+
+def build_knowledge_bundle(snapshot: dict, build_seconds: float = 0.0) -> KnowledgeBundle:
+    system_prompts = {lang: build_system_prompt(pack) for lang, pack in snapshot["packs"].items()}
+    return KnowledgeBundle(
+        # أي تعديل في قاعدة المعلومات أو البرومبت = version جديدة → كاش الإجابات القديم بيتمسح
+        version=hashlib.sha256(system_prompts["mixed"].encode("utf-8")).hexdigest()[:12],
+        source_sha256=snapshot["source_sha256"],
+        packs=snapshot["packs"],
+        system_prompts=system_prompts,
+        loaded_at=time.time(),
+        build_seconds=build_seconds
+    )
+
+
+_knowledge: Optional[KnowledgeBundle] = None
+_knowledge_lock = threading.Lock()
+KNOWLEDGE_RELOADS = 0
+KNOWLEDGE_LAST_ERROR: Optional[str] = None
+
+
+def current_knowledge() -> KnowledgeBundle:
+    """
+    قاعدة المعلومات الحالية. أول نداء بيحمّل الـ snapshot (تقرير الأحجام: python knowledge.py).
+    """
+    global _knowledge
+    if _knowledge is None:
+        with _knowledge_lock:
+            if _knowledge is None:
+                started = time.perf_counter()
+                bundle = build_knowledge_bundle(
+                    load_knowledge(
+                        KNOWLEDGE_SOURCE_FILE,
+                        KNOWLEDGE_SNAPSHOT_FILE,
+                        exclude_tags=KNOWLEDGE_EXCLUDE_TAGS
+                    ),
+                    time.perf_counter() - started
+                )
+                ANSWER_CACHE.version = bundle.version
+                _knowledge = bundle
+    return _knowledge
+
+
+def knowledge_status() -> dict:
+    knowledge = current_knowledge()
+    return {
+        "version": knowledge.version,
+        "loaded_at": knowledge.loaded_at,
+        "build_seconds": knowledge.build_seconds,
+        "reloads": KNOWLEDGE_RELOADS,
+        "last_error": KNOWLEDGE_LAST_ERROR,
+    }
+
+# =========================
+# كاش الإجابات (أسئلة من غير تاريخ محادثة بس)
+# =========================
+# الـ version بتتحدد مع أول تحميل لقاعدة المعلومات (current_knowledge)
+ANSWER_CACHE = AnswerCache(
+    max_entries=2000,
+    ttl_seconds=6 * 3600,
+    min_similarity=0.85
+)
+
+
+def on_knowledge_changed(new_version: str) -> None:
+    """
+    لازم يتنادى بعد أي تغيير في قاعدة المعلومات عشان ما نرجعش إجابات قديمة.
+    """
+    ANSWER_CACHE.invalidate(new_version)
+
+
+def _file_mtime(path: str) -> Optional[float]:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+async def compile_knowledge_snapshot() -> bool:
+    """
+    يبني الـ snapshot من المصدر ويحفظه بس (الـ AI workers بيحمّلوه). يرجع True لو نجح.
+    """
+    global KNOWLEDGE_LAST_ERROR
+    try:
+        await run_blocking(
+            "io", compile_file, KNOWLEDGE_SOURCE_FILE, KNOWLEDGE_SNAPSHOT_FILE, KNOWLEDGE_EXCLUDE_TAGS
+        )
+    except Exception as e:
+        KNOWLEDGE_LAST_ERROR = f"{type(e).__name__}: {e}"
+        print(f"[KNOWLEDGE] Compile failed: {KNOWLEDGE_LAST_ERROR}")
+        return False
+    KNOWLEDGE_LAST_ERROR = None
+    print(f"📚 Knowledge snapshot rebuilt: {KNOWLEDGE_SNAPSHOT_FILE}")
+    return True
+
+
+async def reload_knowledge(compile_source: bool = True) -> bool:
+    """
+    يبني قاعدة المعلومات من المصدر (أو يقرا الـ snapshot الجاهز لو compile_source=False)
+    في thread ويبدّلها (تبديل مرجع واحد → atomic).
+    يرجع True لو اتحمّلت version جديدة. لو البناء فشل بنفضل على النسخة الحالية.
+    """
+    global _knowledge, KNOWLEDGE_RELOADS, KNOWLEDGE_LAST_ERROR
+
+    started = time.perf_counter()
+    try:
+        if compile_source:
+            snapshot = await run_blocking(
+                "io", compile_file, KNOWLEDGE_SOURCE_FILE, KNOWLEDGE_SNAPSHOT_FILE, KNOWLEDGE_EXCLUDE_TAGS
+            )
+        else:
+            snapshot = await run_blocking(
+                "io", load_knowledge, KNOWLEDGE_SOURCE_FILE, KNOWLEDGE_SNAPSHOT_FILE, KNOWLEDGE_EXCLUDE_TAGS
+            )
+        bundle = await run_blocking(
+            "io", build_knowledge_bundle, snapshot, time.perf_counter() - started
+        )
+    except Exception as e:
+        KNOWLEDGE_LAST_ERROR = f"{type(e).__name__}: {e}"
+        print(f"[KNOWLEDGE] Reload failed, keeping `{current_knowledge().version}`: {KNOWLEDGE_LAST_ERROR}")
+        return False
+
+    KNOWLEDGE_LAST_ERROR = None
+    old_version = current_knowledge().version
+    if bundle.version == old_version:
+        return False
+
+    _knowledge = bundle
+    KNOWLEDGE_RELOADS += 1
+    on_knowledge_changed(bundle.version)
+    print(
+        f"📚 Knowledge reloaded: `{old_version}` → `{bundle.version}` "
+        f"in {bundle.build_seconds * 1000:.0f} ms"
+    )
+    # الكاش اتمسح → نسخّن الأسئلة الشائعة تاني على الـ version الجديدة
+    start_answer_cache_warmup(force=True)
+    return True
+
+
+async def watch_knowledge_source(mode: str = KNOWLEDGE_WATCH_RELOAD) -> None:
+    # الـ workers بيراقبوا الـ snapshot، والباقي بيراقب المصدر
+    path = KNOWLEDGE_SNAPSHOT_FILE if mode == KNOWLEDGE_WATCH_LOAD else KNOWLEDGE_SOURCE_FILE
+    last_mtime = _file_mtime(path)
+    while True:
+        await asyncio.sleep(KNOWLEDGE_WATCH_INTERVAL)
+        mtime = _file_mtime(path)
+        if mtime is None or mtime == last_mtime:
+            continue
+
+        await asyncio.sleep(KNOWLEDGE_RELOAD_DEBOUNCE)
+        if _file_mtime(path) != mtime:
+            continue    # لسه بيتكتب → الفحص الجاي
+        try:
+            if mode == KNOWLEDGE_WATCH_COMPILE:
+                await compile_knowledge_snapshot()
+            else:
+                await reload_knowledge(compile_source=mode == KNOWLEDGE_WATCH_RELOAD)
+        except Exception as e:
+            print(f"[KNOWLEDGE] Watcher error: {e}")
+            continue
+        # فشل → last_mtime ما بيتقدمش فبنحاول تاني في الفحص الجاي
+        if KNOWLEDGE_LAST_ERROR is None:
+            last_mtime = mtime
+
+
+_knowledge_watch_task: Optional[asyncio.Task] = None
+
+
+def start_knowledge_watcher(mode: str = KNOWLEDGE_WATCH_RELOAD) -> None:
+    global _knowledge_watch_task
+    if not KNOWLEDGE_WATCH_ENABLED or _knowledge_watch_task is not None:
+        return
+    _knowledge_watch_task = asyncio.create_task(watch_knowledge_source(mode))
+
+
+# =========================
+# سجل أسئلة الـ AI (لتدريب الـ classifier واستخراج الأسئلة الشائعة)
+# =========================
+# مقفول افتراضيًا (أسئلة الناس وردودها بتتكتب على الديسك) → AI_LOG=1 في .env
+AI_LOG_ENABLED = os.getenv("AI_LOG", "").strip().lower() in ("1", "true", "yes")
+AI_LOG_FILE = "ai_log.jsonl"
+
+# الموديل بيتدرب offline بـ train_offtopic.py
+OFFTOPIC_MODEL_FILE = "offtopic_model.json"
+_offtopic_classifier: Optional[OffTopicClassifier] = None
+_offtopic_loaded = False
+
+
+def offtopic_classifier() -> Optional[OffTopicClassifier]:
+    # بيتحمّل مع أول سؤال (None لو الملف مش موجود)
+    global _offtopic_classifier, _offtopic_loaded
+    if not _offtopic_loaded:
+        _offtopic_classifier = OffTopicClassifier.load(OFFTOPIC_MODEL_FILE)
+        _offtopic_loaded = True
+    return _offtopic_classifier
+
+
+def is_off_topic(text: str) -> bool:
+    # الـ stage بتاع "offtopic" (الـ classifier بيتحمّل في كل process مع أول استخدام)
+    classifier = offtopic_classifier()
+    return classifier is not None and classifier.is_off_topic(text)
+
+
+def _append_ai_log(entry: dict) -> None:
+    try:
+        with open(AI_LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"[AI LOG ERROR] {e}")
+
+
+async def record_ai_exchange(
+    channel_id: int,
+    user_id: int,
+    question: str,
+    answer: str,
+    source: str,
+    history_len: int,
+    latency: Optional[float] = None
+) -> None:
+    """
+    يحدّث تاريخ المحادثة ويسجل السؤال والرد في AI_LOG_FILE.
+    source: model | quick | offtopic | cache | error
+    """
+    # السؤال والرد في عملية واحدة على الـ backend
+    await run_state(add_to_history, channel_id, user_id, [
+        {"role": "user", "content": question},
+        {"role": "assistant", "content": answer},
+    ])
+    AI_ANSWERS.inc(source=source)
+
+    if not AI_LOG_ENABLED:
+        return
+    entry = {
+        "ts": round(time.time(), 3),
+        "channel_id": channel_id,
+        "question": question,
+        "answer": answer,
+        "source": source,
+        "history_len": history_len,
+        "latency": round(latency, 3) if latency is not None else None,
+    }
+    # الكتابة على الديسك في thread عشان ما توقفش الـ event loop
+    executor("io").submit(_append_ai_log, entry)
+
+
+# =========================
+# GEMINI
+# =========================
+
+def prompt_language(user_message: str, history: List[Dict[str, str]]) -> str:
+    """
+    لغة الباك اللي هيتبعت: لغة الرسالة الحالية، ولو مفيهاش حروف (إيموجي / أرقام)
+    لغة آخر رسالة لليوزر، ولو مش واضحة → "mixed" (النص الكامل).
+    """
+    lang = detect_language(user_message)
+    if lang is None:
+        for msg in reversed(history):
+            if msg.get("role") == "user":
+                lang = detect_language(msg.get("content", ""))
+                if lang is not None:
+                    break
+    return lang or "mixed"
+
+
+def build_conversation_prompt(
+    user_message: str,
+    history: List[Dict[str, str]],
+    knowledge: Optional[KnowledgeBundle] = None
+) -> str:
+    """
+    يبني برومبت نصي فيه الـ System Prompt + تاريخ المحادثة + رسالة المستخدم الحالية
+    """
+    knowledge = knowledge or current_knowledge()
+    system_prompt = knowledge.system_prompts[prompt_language(user_message, history)]
+    convo_lines = [system_prompt, "\n[CONVERSATION START]\n"]
+
+    for msg in history:
+        role = msg.get("role", "user")
+        content = msg.get("content", "")
+        if role == "user":
+            convo_lines.append(f"USER: {content}\n")
+        else:
+            convo_lines.append(f"ASSISTANT: {content}\n")
+
+    convo_lines.append(f"USER: {user_message}\nASSISTANT:")
+    return "\n".join(convo_lines)
+
+def trim_to_last_sentence(text: str) -> str:
+    """
+    الرد اتقطع عند max_output_tokens → نشيل آخر جملة ناقصة لو فيه جملة كاملة قبلها.
+    """
+    cut = max(text.rfind("\n"), *(text.rfind(p) for p in (". ", "! ", "? ", "؟ ", "۔ ")))
+    if cut > len(text) // 2:
+        return text[:cut + 1].rstrip()
+    return text.rstrip()
+
+
+async def generate_gp_team_reply(
+    prompt: str,
+    priority_class: str = "default",
+    route_name: str = "flash",
+    profile_name: str = "general"
+) -> Tuple[str, str, float]:
+    """
+    يبعت البرومبت لـ Gemini (من خلال الـ scheduler) ويطلع النص من الرد.
+    يرجع (text, source, latency) و source = "model" أو "error" لو الرد فاضي / اتوقف للـ safety.
+    """
+    route = MODEL_ROUTER.by_name[route_name]
+    model = get_model(route.model_name)
+    generation_config = build_generation_config(route, GENERATION_PROFILES, profile_name)
+
+    def _call_gemini():
+       return model.generate_content(prompt, generation_config=generation_config)
+
+    queued_at = time.perf_counter()
+    async with ai_scheduler("chat").slot(priority_class):
+        observe_stage("queue_wait", time.perf_counter() - queued_at, route.model_name)
+        started = time.perf_counter()
+        try:
+            with stage_timer("gemini_call", route.model_name) as timer:
+                response = await run_model_call("chat", _call_gemini)
+                timer.outcome = response_outcome(response)
+        except Exception:
+            MODEL_ROUTER.record(route_name, time.perf_counter() - started, ok=False)
+            raise
+        latency = time.perf_counter() - started
+
+    with stage_timer("response_parse", route.model_name) as parse_timer:
+        text, source = extract_reply_text(response)
+        if source != "model":
+            parse_timer.outcome = "error"
+
+    prompt_tokens, output_tokens = usage_tokens(response)
+    MODEL_ROUTER.record(route_name, latency, source == "model", prompt_tokens, output_tokens)
+
+    return text, source, latency
+
+
+def extract_reply_text(response) -> Tuple[str, str]:
+    """
+    (text, source): النص من أول candidate خلص طبيعي، أو رسالة خطأ و source = "error".
+    """
+    text = ""
+    source = "model"
+
+    try:
+        if getattr(response, "candidates", None):
+            for cand in response.candidates:
+                fr = getattr(cand, "finish_reason", None)
+                fr_name = getattr(fr, "name", fr)
+
+                # لو الرد متوقف بشكل طبيعي (STOP) أو وصل لسقف التوكنز (MAX_TOKENS) يبقى ناخد المحتوى
+                if fr_name in (None, "STOP", 0, 1, "MAX_TOKENS", 2):
+                    parts = getattr(cand, "content", None)
+                    if parts and getattr(parts, "parts", None):
+                        texts = []
+                        for p in parts.parts:
+                            if hasattr(p, "text") and p.text:
+                                texts.append(p.text)
+                        if texts:
+                            text = "\n".join(texts).strip()
+                            if fr_name in ("MAX_TOKENS", 2):
+                                text = trim_to_last_sentence(text)
+                            break
+
+        if not text:
+            source = "error"
+            text = AI_EMPTY_REPLY
+
+
+    except Exception as inner_e:
+        print(f"Gemini parse error: {inner_e}")
+        source = "error"
+        text = AI_ERROR_REPLY
+
+    return text, source
+
+
+async def ask_gp_team_ai(
+    user_message: str,
+    channel_id: int,
+    user_id: int,
+    priority_class: str = "default"
+) -> str:
+    """
+    يطلب رد من Gemini مع استخدام تاريخ المحادثة لكل (قناة، مستخدم)
+    ويتعامل مع حالات الـ safety لما الموديل ميطلعش أي نص
+    """
+    try:
+        history = await run_state(get_history, channel_id, user_id)
+
+        # تحية / شكر / إيموجي → رد محلي فوري من غير ما نكلم الموديل
+        last_user_text = next(
+            (m["content"] for m in reversed(history) if m.get("role") == "user"),
+            ""
+        )
+        quick = quick_reply(user_message, fallback_lang=dominant_language(last_user_text))
+        if quick is not None:
+            await record_ai_exchange(channel_id, user_id, user_message, quick, "quick", len(history))
+            return quick
+
+        # سؤال مالوش علاقة بـ GP Team (بثقة عالية) → رفض جاهز من غير موديل
+        if offtopic_classifier() is not None and await run_stage("offtopic", user_message):
+            refusal = refusal_reply(user_message)
+            await record_ai_exchange(channel_id, user_id, user_message, refusal, "offtopic", len(history))
+            return refusal
+
+        # سؤال متكرر (FAQ) من غير تاريخ → نرجع الإجابة من الكاش
+        if not history:
+            cached = ANSWER_CACHE.get(user_message)
+            if cached is not None:
+                await record_ai_exchange(channel_id, user_id, user_message, cached, "cache", 0)
+                return cached
+
+        # نسخة قاعدة المعلومات بتاعة الطلب ده (لو حصل reload في النص الطلب بيكمل عليها)
+        knowledge = current_knowledge()
+        with stage_timer("prompt_build"):
+            prompt = build_conversation_prompt(user_message, history, knowledge)
+        decision = MODEL_ROUTER.choose(user_message, len(history))
+
+        text, source, latency = await generate_gp_team_reply(
+            prompt,
+            priority_class,
+            decision.route.name,
+            decision.profile
+        )
+
+        if source == "model" and not history and knowledge is current_knowledge():
+            ANSWER_CACHE.put(user_message, text, gen_latency=latency)
+
+        # تحديث التاريخ (User + Assistant) بعد ما نحدد النص النهائي
+        await record_ai_exchange(channel_id, user_id, user_message, text, source, len(history), latency)
+
+        return text
+
+    except Exception as e:
+        print(f"Gemini Error: {e}")
+        return AI_ERROR_REPLY
+
+
+# =========================
+# FAQ Warm-up (تسخين كاش الإجابات بعد الريستارت)
+# =========================
+# faq.json: {"ar": [...], "en": [...]} — ممكن يتولد من السجل بـ mine_faq.py
+FAQ_FILE = "faq.json"
+# الإجابات المتولدة بتتحفظ هنا عشان الريستارت الجاي ما يكلمش الموديل تاني
+# (طالما version قاعدة المعلومات ما اتغيرتش)
+FAQ_ANSWERS_FILE = "faq_answers.json"
+
+_warmup_task: Optional[asyncio.Task] = None
+
+
+def load_faq_questions() -> List[str]:
+    if not os.path.exists(FAQ_FILE):
+        return []
+    try:
+        with open(FAQ_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return [q for lang in ("ar", "en") for q in data.get(lang, [])]
+    except Exception as e:
+        print(f"[FAQ WARMUP] Failed to load {FAQ_FILE}: {e}")
+        return []
+
+
+def load_faq_answers(version: str) -> Dict[str, dict]:
+    if not os.path.exists(FAQ_ANSWERS_FILE):
+        return {}
+    try:
+        with open(FAQ_ANSWERS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != version:
+            return {}
+        return data.get("answers", {})
+    except Exception:
+        return {}
+
+
+def save_faq_answers(version: str, answers: Dict[str, dict]) -> None:
+    # أكتر من worker ممكن يحفظوا في نفس الوقت → ملف مؤقت + replace
+    tmp_path = f"{FAQ_ANSWERS_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "answers": answers}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, FAQ_ANSWERS_FILE)
+
+
+async def warm_up_answer_cache() -> None:
+    """
+    يحمّل / يولّد إجابات الأسئلة الشائعة في ANSWER_CACHE.
+    بيشتغل في الخلفية بأقل أولوية عشان ما يزاحمش طلبات اليوزرز.
+    """
+    questions = load_faq_questions()
+    if not questions:
+        return
+
+    knowledge = current_knowledge()
+    version = knowledge.version
+    started = time.perf_counter()
+    answers = await run_blocking("io", load_faq_answers, version)
+    loaded = generated = failed = 0
+
+    for question in questions:
+        if knowledge is not current_knowledge():
+            # قاعدة المعلومات اتغيرت في النص → الإجابات دي بقت قديمة
+            print("[FAQ WARMUP] Knowledge changed during warm-up, stopping.")
+            return
+
+        saved = answers.get(question)
+        if saved is not None:
+            ANSWER_CACHE.put(question, saved["answer"], gen_latency=saved.get("latency", 0.0))
+            loaded += 1
+            continue
+
+        try:
+            prompt = build_conversation_prompt(question, [], knowledge)
+            profile = MODEL_ROUTER.choose(question).profile
+            text, source, latency = await generate_gp_team_reply(
+                prompt, "background", "flash", profile
+            )
+        except Exception as e:
+            print(f"[FAQ WARMUP] {question!r}: {e}")
+            failed += 1
+            continue
+
+        if source != "model":
+            failed += 1
+            continue
+        if knowledge is not current_knowledge():
+            print("[FAQ WARMUP] Knowledge changed during warm-up, stopping.")
+            return
+        ANSWER_CACHE.put(question, text, gen_latency=latency)
+        answers[question] = {"answer": text, "latency": round(latency, 3)}
+        generated += 1
+
+    if generated:
+        await run_blocking("io", save_faq_answers, version, answers)
+
+    print(
+        f"🔥 FAQ warm-up done in {time.perf_counter() - started:.1f}s "
+        f"(loaded: {loaded}, generated: {generated}, failed: {failed})"
+    )
+
+
+def start_answer_cache_warmup(force: bool = False) -> None:
+    global _warmup_task
+    # on_ready بيتنادى تاني مع كل reconnect → نسخّن مرة واحدة بس
+    # (force: بعد reload لقاعدة المعلومات → نلغي القديم ونبدأ من الأول)
+    if _warmup_task is not None:
+        if not force:
+            return
+        _warmup_task.cancel()
+    _warmup_task = asyncio.create_task(warm_up_answer_cache())
+
+
+# =========================
+# Metrics (بتتقرا من الإحصائيات الموجودة وقت الـ scrape)
+# =========================
+AI_ANSWERS = counter("gp_ai_answers_total", "AI answers by source", ("source",))
+
+
+def _core_metrics():
+    scheduler = [
+        ({"workload": workload, "class": name}, st)
+        for workload, classes in ai_scheduler_stats().items()
+        for name, st in classes.items()
+    ]
+    yield Family("gp_scheduler_queued", "gauge", "Gemini requests waiting for a slot",
+                 [(labels, st["queued"]) for labels, st in scheduler])
+    yield Family("gp_scheduler_active", "gauge", "Gemini requests running",
+                 [(labels, st["active"]) for labels, st in scheduler])
+    yield Family("gp_scheduler_admitted_total", "counter", "Gemini requests admitted",
+                 [(labels, st["admitted"]) for labels, st in scheduler])
+
+    routes = MODEL_ROUTER.stats()
+    yield Family("gp_route_requests_total", "counter", "Chat requests per model route",
+                 [({"route": name}, st["requests"]) for name, st in routes.items()])
+    yield Family("gp_route_errors_total", "counter", "Failed chat requests per model route",
+                 [({"route": name}, st["errors"]) for name, st in routes.items()])
+    yield Family("gp_route_tokens_total", "counter", "Gemini tokens per model route",
+                 [({"route": name, "direction": "prompt"}, st["prompt_tokens"]) for name, st in routes.items()]
+                 + [({"route": name, "direction": "output"}, st["output_tokens"]) for name, st in routes.items()])
+
+    cache = ANSWER_CACHE.stats.as_dict()
+    yield Family("gp_answer_cache_entries", "gauge", "Answers in the cache", [({}, len(ANSWER_CACHE))])
+    yield Family("gp_answer_cache_lookups_total", "counter", "Answer cache lookups",
+                 [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])])
+
+    executors = executor_stats()
+    yield Family("gp_executor_queued", "gauge", "Blocking calls waiting for a thread",
+                 [({"executor": name}, st["queued"]) for name, st in executors.items()])
+    yield Family("gp_executor_active", "gauge", "Threads running a blocking call",
+                 [({"executor": name}, st["active"]) for name, st in executors.items()])
+    yield Family("gp_executor_threads", "gauge", "Executor size",
+                 [({"executor": name}, st["max_workers"]) for name, st in executors.items()])
+
+    stages = {name: st.as_dict() for name, st in stage_pool().stats.items()}
+    yield Family("gp_stage_pool_items_total", "counter", "Items run by each CPU stage",
+                 [({"stage": name}, st["items"]) for name, st in stages.items()])
+    yield Family("gp_stage_pool_batches_total", "counter", "Batches sent to the stage process pool",
+                 [({"stage": name}, st["batches"]) for name, st in stages.items()])
+
+    yield Family("gp_knowledge_reloads_total", "counter", "Knowledge hot reloads", [({}, KNOWLEDGE_RELOADS)])
+
+
+register_collector("core", _core_metrics)
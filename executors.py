@@ -0,0 +1,150 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# =========================
+# Executors منفصلة لكل نوع شغل blocking
+# =========================
+# asyncio.to_thread كله كان على الـ default executor (حجمه من عدد الـ CPUs)، فموجة AutoMod
+# كانت بتاخد كل الـ threads والشات يستنى. هنا كل workload ليه pool بحجمه:
+#   moderation: طلبات Gemini بتاعة AutoMod
+#   chat:       طلبات Gemini بتاعة الشات + تسخين الكاش
+#   io:         ملفات (قاعدة المعلومات، الـ FAQ، سجل الـ AI)
+#   state:      الـ state backend المشترك (SQLite / Redis): التاريخ والكول داون والإعدادات
+#
+# الأحجام: EXECUTOR_SIZES في .env، مثلًا EXECUTOR_SIZES=moderation=4,chat=16,io=2
+# (اللي مش مذكور بياخد الافتراضي). /aistats بيعرض الطابور والشغالين لكل واحد.
+
+DEFAULT_EXECUTOR_SIZES: Dict[str, int] = {
+    "moderation": 4,
+    "chat": 8,
+    "io": 2,
+    "state": 4,
+}
+
+
+def executor_sizes(spec: Optional[str] = None) -> Dict[str, int]:
+    sizes = dict(DEFAULT_EXECUTOR_SIZES)
+    spec = spec if spec is not None else os.getenv("EXECUTOR_SIZES", "")
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, value = part.partition("=")
+        try:
+            sizes[name.strip()] = max(1, int(value))
+        except ValueError:
+            print(f"[EXECUTORS] ignoring invalid size: {part.strip()!r}")
+    return sizes
+
+
+class NamedExecutor:
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"gp-{name}")
+        self._lock = threading.Lock()
+        self.queued = 0          # مستنيين thread
+        self.active = 0          # شغالين دلوقتي
+        self.completed = 0
+        self.failed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        من غير انتظار (fire-and-forget أو من كود sync).
+        """
+        submitted = time.monotonic()
+        context = contextvars.copy_context()
+
+        def _run():
+            waited = time.monotonic() - submitted
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+            ok = False
+            try:
+                result = context.run(fn, *args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                    if not ok:
+                        self.failed += 1
+
+        with self._lock:
+            self.queued += 1
+        future = self._pool.submit(_run)
+        future.add_done_callback(self._on_cancelled)
+        return future
+
+    def _on_cancelled(self, future: Future) -> None:
+        # اتلغى قبل ما يبدأ (الـ coroutine اللي مستنياه اتلغت) → _run ما اشتغلش
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        زي asyncio.to_thread بس على الـ pool ده.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> dict:
+        with self._lock:
+            started = self.completed + self.active
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "failed": self.failed,
+                "wait_avg": self.wait_total / started if started else 0.0,
+                "wait_max": self.wait_max,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executors: Dict[str, NamedExecutor] = {}
+_executors_lock = threading.Lock()
+_sizes: Optional[Dict[str, int]] = None
+
+
+def _configured_sizes() -> Dict[str, int]:
+    global _sizes
+    if _sizes is None:
+        _sizes = executor_sizes()
+    return _sizes
+
+
+def executor(name: str) -> NamedExecutor:
+    """
+    الـ executor بالاسم ده (بيتعمل مع أول استخدام بالحجم من EXECUTOR_SIZES).
+    """
+    with _executors_lock:
+        pool = _executors.get(name)
+        if pool is None:
+            sizes = _configured_sizes()
+            if name not in sizes:
+                raise KeyError(f"unknown executor: {name}")
+            pool = _executors[name] = NamedExecutor(name, sizes[name])
+        return pool
+
+
+async def run_blocking(name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    return await executor(name).run(fn, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, dict]:
+    # ThreadPoolExecutor ما بيعملش threads غير مع أول submit → نعمل الكل عشان يظهروا بأحجامهم
+    return {name: executor(name).stats() for name in _configured_sizes()}
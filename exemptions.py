@@ -0,0 +1,70 @@
+from typing import Dict, Iterable, Mapping, Optional, Set
+
+# =========================
+# Exempt Index: مين مستثنى من AutoMod في كل سيرفر
+# =========================
+# بدل ما نلف على member.roles مع كل رسالة:
+# - رولات الاستثناء لكل سيرفر (من config.json، ولو مش متحددة → الرولات الافتراضية)
+# - set فيها IDs الأعضاء المستثنين لكل سيرفر → الفحص O(1)
+# الـ set بتتبني مرة في on_ready / دخول سيرفر وبتتحدث من events الأعضاء والرولات.
+
+
+class ExemptIndex:
+    def __init__(
+        self,
+        default_roles: Iterable[int],
+        guild_roles: Optional[Mapping[int, Iterable[int]]] = None,
+    ):
+        self.default_roles: Set[int] = set(default_roles)
+        self.guild_roles: Dict[int, Set[int]] = {
+            int(gid): set(roles) for gid, roles in (guild_roles or {}).items()
+        }
+        self._members: Dict[int, Set[int]] = {}
+
+    # ---------- رولات الاستثناء ----------
+
+    def exempt_roles(self, guild_id: int) -> Set[int]:
+        return self.guild_roles.get(guild_id, self.default_roles)
+
+    def set_roles(self, guild_id: int, role_ids: Iterable[int]) -> None:
+        # بعد التغيير لازم rebuild للسيرفر (اللي معاه الرول الجديد مش معروف هنا)
+        self.guild_roles[guild_id] = set(role_ids)
+        self._members.pop(guild_id, None)
+
+    def has_role(self, guild_id: int, role_ids: Iterable[int]) -> bool:
+        roles = self.exempt_roles(guild_id)
+        return any(role_id in roles for role_id in role_ids)
+
+    # ---------- الأعضاء ----------
+
+    def rebuild(self, guild_id: int, member_ids: Iterable[int]) -> None:
+        self._members[guild_id] = set(member_ids)
+
+    def drop_guild(self, guild_id: int) -> None:
+        self._members.pop(guild_id, None)
+
+    def update_member(self, guild_id: int, member_id: int, role_ids: Iterable[int]) -> None:
+        members = self._members.get(guild_id)
+        if members is None:
+            return
+        if self.has_role(guild_id, role_ids):
+            members.add(member_id)
+        else:
+            members.discard(member_id)
+
+    def remove_member(self, guild_id: int, member_id: int) -> None:
+        members = self._members.get(guild_id)
+        if members is not None:
+            members.discard(member_id)
+
+    def is_exempt(self, guild_id: int, member_id: int) -> Optional[bool]:
+        """
+        True / False، أو None لو السيرفر لسه ما اتبناش (الـ caller يرجع لفحص الرولات).
+        """
+        members = self._members.get(guild_id)
+        if members is None:
+            return None
+        return member_id in members
+
+    def stats(self) -> Dict[int, int]:
+        return {guild_id: len(members) for guild_id, members in self._members.items()}
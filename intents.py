@@ -0,0 +1,246 @@
+import itertools
+import re
+import unicodedata
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from textproc import dominant_language, normalize
+
+# =========================
+# Fast-path: تحيات / شكر / إيموجي بدون موديل
+# =========================
+# الرسالة لازم تكون كلها تحية أو شكر (+ كلمات نداء زي "يا شباب" / "bro")،
+# أي كلمة تانية → الرسالة تروح للموديل عادي.
+# البوت بيعدي التحيات من AutoMod → أي منشن / لينك / @ في النص الأصلي = مش تحية
+# (normalize بيشيل الـ @ فـ "hi @everyone" كانت بتعدي كتحية).
+
+_GREETING_PHRASES = [
+    # عربي
+    "هلا", "هلو", "هلا والله", "يا هلا", "اهلا", "اهلين", "اهلا وسهلا", "اهلا بك",
+    "مرحبا", "مرحبتين", "سلام", "السلام عليكم", "سلام عليكم",
+    "السلام عليكم ورحمه الله", "السلام عليكم ورحمه الله وبركاته",
+    "صباح الخير", "صباح النور", "مساء الخير", "مساء النور", "هاي",
+    # English
+    "hi", "hello", "hey", "heya", "hiya", "yo", "sup", "wassup", "whats up",
+    "good morning", "good afternoon", "good evening", "greetings", "howdy",
+    "salam", "salam alaikum", "assalamu alaikum", "assalam alaikum", "hola",
+]
+
+_THANKS_PHRASES = [
+    # عربي
+    "شكرا", "شكرا لك", "شكرا ليك", "شكرا جزيلا", "شكرا كتير", "شكرا كثير",
+    "مشكور", "مشكورين", "تسلم", "تسلم ايدك", "تسلم يدك", "يعطيك العافيه",
+    "الله يعطيك العافيه", "جزاك الله خير", "جزاك الله خيرا", "ميرسي", "متشكر",
+    # English
+    "thanks", "thank you", "thank u", "thx", "thnx", "tnx", "ty", "tysm",
+    "thanks a lot", "thank you so much", "thanks so much", "many thanks",
+    "appreciate it", "much appreciated", "cheers",
+]
+
+# كلمات نداء مسموح تيجي مع التحية أو الشكر
+_FILLER_WORDS = {
+    "يا", "شباب", "بوت", "حبيبي", "اخوي", "اخي", "غالي", "ياغالي", "عليكم",
+    "جميعا", "كلكم", "مساعد",
+    "there", "bro", "man", "guys", "bot", "gp",
+    "assistant", "again", "so", "much", "very", "you", "u", "dear", "sir",
+}
+
+_POSITIVE_EMOJIS = set(
+    "❤♥💙💜💚💛🧡🖤🤍💖💗💕😀😃😄😁😅😂🤣🙂😊😇😍🥰😘😎🤗"
+    "🤝👍👌🙏👏👋🫡💯🔥✨🎉☺"
+)
+# variation selector + skin tones + ZWJ
+_EMOJI_MODIFIERS = {"\ufe0f", "\u200d"} | {chr(c) for c in range(0x1F3FB, 0x1F400)}
+
+_MAX_WORDS = 8
+
+
+def _build_phrases(phrases: List[str]) -> List[Tuple[str, ...]]:
+    # الأطول الأول عشان "السلام عليكم ورحمه الله" تتقري كاملة
+    built = {tuple(normalize(p).split()) for p in phrases}
+    return sorted(built, key=len, reverse=True)
+
+
+_PHRASES: Dict[str, List[Tuple[str, ...]]] = {
+    "greeting": _build_phrases(_GREETING_PHRASES),
+    "thanks": _build_phrases(_THANKS_PHRASES),
+}
+_FILLERS = {normalize(w) for w in _FILLER_WORDS}
+_WHITESPACE = re.compile(r"\s+")
+# منشن (<@id> / <@&id> / <#id>) أو @ لوحدها أو لينك
+_UNSAFE = re.compile(
+    r"@|<[#@]|https?://|www\.|discord\.gg|\b[\w-]+\.(?:com|net|org|gg|io|me|ly|xyz|co)\b",
+    re.IGNORECASE
+)
+
+
+def _has_mentions_or_links(text: str) -> bool:
+    # NFKC عشان "＠everyone" (full-width) تتقري @ عادية
+    return bool(_UNSAFE.search(unicodedata.normalize("NFKC", text)))
+
+
+def _is_emoji_only(text: str) -> bool:
+    chars = [c for c in _WHITESPACE.sub("", text) if c not in _EMOJI_MODIFIERS]
+    return bool(chars) and all(c in _POSITIVE_EMOJIS for c in chars)
+
+
+def detect_smalltalk(text: str) -> Optional[str]:
+    """
+    يرجع "greeting" أو "thanks" أو "emoji" لو الرسالة كلها من النوع ده،
+    أو None لو فيها أي محتوى تاني (يعني محتاجة الموديل) أو منشن / لينك.
+    """
+    if _has_mentions_or_links(text):
+        return None
+    if _is_emoji_only(text):
+        return "emoji"
+
+    words = normalize(text).split()
+    if not words or len(words) > _MAX_WORDS:
+        return None
+
+    found = set()
+    i = 0
+    while i < len(words):
+        for intent, phrases in _PHRASES.items():
+            match = next(
+                (p for p in phrases if tuple(words[i:i + len(p)]) == p),
+                None
+            )
+            if match:
+                found.add(intent)
+                i += len(match)
+                break
+        else:
+            if words[i] not in _FILLERS:
+                return None
+            i += 1
+
+    if not found:
+        return None
+    # "hi, thanks" → شكر
+    return "thanks" if "thanks" in found else "greeting"
+
+
+# =========================
+# الردود الجاهزة (بتلف بالدور)
+# =========================
+
+_QUICK_REPLIES = {
+    ("greeting", "ar"): [
+        "أهلًا بيك! 👋 أنا المساعد الرسمي لـ **GP Team**، أقدر أساعدك في أي سؤال عن الخدمات أو القوانين أو الطلبات.",
+        "هلا والله! 😊 معاك مساعد **GP Team** الرسمي، اسألني عن خدماتنا أو طريقة الطلب.",
+        "مرحبا بيك! أنا مساعد **GP Team**، كيف أقدر أساعدك اليوم؟",
+    ],
+    ("greeting", "en"): [
+        "Hey there! 👋 I'm the official **GP Team** assistant — ask me anything about our services, rules, or orders.",
+        "Hello! 😊 I'm **GP Team**'s official assistant. How can I help you today?",
+        "Hi! I'm here to help with anything related to **GP Team** — services, orders, or community info.",
+    ],
+    ("thanks", "ar"): [
+        "العفو! 🤝 لو عندك أي سؤال تاني عن **GP Team** أنا موجود.",
+        "ولا يهمك! 😊 أنا هنا لأي استفسار عن خدمات **GP Team**.",
+        "تسلم! لو احتجت أي مساعدة بخصوص **GP Team** اسأل في أي وقت.",
+    ],
+    ("thanks", "en"): [
+        "You're welcome! 🤝 Let me know if you have any other questions about **GP Team**.",
+        "Anytime! 😊 I'm here whenever you need help with **GP Team**.",
+        "Glad I could help! Feel free to ask anything else about **GP Team**.",
+    ],
+    ("emoji", "ar"): [
+        "😊 منور! لو عندك أي سؤال عن **GP Team** أنا جاهز.",
+        "❤️ شكرًا لك! أقدر أساعدك في أي حاجة تخص **GP Team**.",
+    ],
+    ("emoji", "en"): [
+        "😊 Glad to see you! Ask me anything about **GP Team**.",
+        "❤️ Thanks! I'm here if you need help with **GP Team**.",
+    ],
+}
+
+_ROTATIONS: Dict[Tuple[str, str], Iterator[str]] = {
+    key: itertools.cycle(replies) for key, replies in _QUICK_REPLIES.items()
+}
+
+
+def quick_reply(text: str, fallback_lang: str = "ar") -> Optional[str]:
+    """
+    رد محلي فوري للتحيات / الشكر / الإيموجي.
+    يرجع None لو الرسالة محتاجة الموديل.
+    fallback_lang: اللغة لو الرسالة مفيهاش حروف (إيموجي بس).
+    """
+    intent = detect_smalltalk(text)
+    if intent is None:
+        return None
+    lang = dominant_language(text, default=fallback_lang)
+    return next(_ROTATIONS[(intent, lang)])
+
+
+# =========================
+# تصنيف نية الرسالة (للراوتر وإعدادات التوليد)
+# =========================
+# مطابقة كلمات بسيطة بعد التطبيع؛ الترتيب مهم (أول نية بتطابق هي اللي بتكسب).
+
+_INTENT_KEYWORDS = {
+    "complaint": [
+        "شكوي", "مشكله", "زعلان", "متضايق", "سيء", "سيئ", "نصب", "تاخير", "اتاخر",
+        "ما وصل", "مش شغال", "مو شغال", "ما يشتغل", "استرجاع", "refund",
+        "complaint", "complain", "problem", "issue", "scam", "not working",
+        "broken", "delay", "delayed", "angry", "disappointed", "bad service",
+    ],
+    "pricing": [
+        "سعر", "اسعار", "السعر", "الاسعار", "بكم", "كم يكلف", "كم سعر", "تكلفه",
+        "فلوس", "دفع", "الدفع", "خصم", "price", "prices", "pricing", "cost",
+        "how much", "payment", "pay", "discount", "cheap", "budget",
+    ],
+    "ordering": [
+        "اطلب", "طلب", "اشتري", "تذكره", "تكت", "تيكت", "order", "buy",
+        "purchase", "ticket", "hire", "request a",
+    ],
+}
+
+_DETAIL_KEYWORDS = [
+    "بالتفصيل", "تفصيل", "تفاصيل", "اشرح", "وضح", "شرح كامل", "كل شي", "كل حاجه",
+    "in detail", "detailed", "details", "explain", "elaborate", "step by step",
+    "everything about", "full explanation",
+]
+
+
+def _compile_keywords(words: List[str]) -> "re.Pattern":
+    alternatives = sorted({normalize(w) for w in words}, key=len, reverse=True)
+    return re.compile(r"(?<!\w)(?:" + "|".join(map(re.escape, alternatives)) + r")(?!\w)")
+
+
+_INTENT_PATTERNS = {
+    intent: _compile_keywords(words) for intent, words in _INTENT_KEYWORDS.items()
+}
+_DETAIL_PATTERN = _compile_keywords(_DETAIL_KEYWORDS)
+_QUESTION_MARKS = re.compile(r"[?؟]")
+_LIST_ITEM = re.compile(r"(?m)^\s*(?:\d+[.)-]|[-•*])\s+")
+
+
+def wants_detail(text: str) -> bool:
+    return bool(_DETAIL_PATTERN.search(normalize(text)))
+
+
+def count_questions(text: str) -> int:
+    """
+    عدد الأسئلة التقريبي في الرسالة (علامات استفهام أو نقاط مرقمة).
+    """
+    marks = len(_QUESTION_MARKS.findall(text))
+    items = len(_LIST_ITEM.findall(text))
+    return max(1, marks, items)
+
+
+def classify_intent(text: str) -> str:
+    """
+    يرجع: greeting | thanks | emoji | complaint | pricing | ordering | detailed | general
+    """
+    smalltalk = detect_smalltalk(text)
+    if smalltalk is not None:
+        return smalltalk
+
+    normalized = normalize(text)
+    for intent, pattern in _INTENT_PATTERNS.items():
+        if pattern.search(normalized):
+            return intent
+    if _DETAIL_PATTERN.search(normalized):
+        return "detailed"
+    return "general"
@@ -0,0 +1,409 @@
+"""
+كومبايلر قاعدة معلومات GP Team.
+
+المصدر: knowledge/gp_team.md — أقسام "## العنوان" وبعد كل عنوان سطر اختياري
+"<!-- tags: a, b -->". الكومبايلر:
+- بيشيل القواعد المكررة حرفيًا (بعد التطبيع) — أول ظهور هو اللي بيفضل
+- بيكتب الأقسام بعناوين Markdown قصيرة بدل فواصل "=====" الطويلة
+- بيبني باك لكل لغة (ar / en) + النص الكامل (mixed)
+- بيطلع snapshot جاهز (JSON) البوت بيحمّله على طول وقت التشغيل
+
+باكات اللغة: النص فيه أمثلة ردود بالعربي والإنجليزي ولينكات قنوات للغتين،
+والطلب الواحد محتاج لغة واحدة بس. الباك بيشيل:
+- سطور "Arabic:" / "English:" (والأسطر اللي تحتها) للغة التانية
+- السطور المعلّمة (AR) / (EN) للغة التانية — إلا لو فيها قناة / لينك (دي معلومة مش مثال،
+  واليوزر ممكن يطلب قناة اللغة التانية) فبتفضل في الباكين
+- أمثلة الردود اللي بين علامات تنصيص ومكتوبة بحروف اللغة التانية
+
+البناء + تقرير التوكنز لكل قسم ولكل باك:
+    python knowledge.py
+    python knowledge.py --near-dups     # يعرض القواعد المتشابهة (مش متطابقة) للمراجعة
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from textproc import detect_language, normalize
+
+LANGUAGES = ("ar", "en")
+_OTHER = {"ar": "en", "en": "ar"}
+
+_LANG_HEADER = re.compile(r"^(\s*)(?:[-•*]\s*)?(Arabic|English)\s*:\s*(.*)$")
+_LANG_TAG = re.compile(r"\((AR|EN)\)")
+_QUOTED = re.compile(r"^\s*(?:[-•*]\s*)?[\"“].*[\"”]\s*$")
+_CHANNEL_FACT = re.compile(r"<#\d+>|https?://")
+_HEADER_LANG = {"Arabic": "ar", "English": "en"}
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def line_languages(lines: List[str]) -> List[Optional[str]]:
+    """
+    لكل سطر: "ar" / "en" لو السطر خاص بلغة واحدة، أو None لو مشترك.
+    """
+    result: List[Optional[str]] = []
+    block_lang: Optional[str] = None
+    block_indent = -1
+
+    for line in lines:
+        stripped = line.strip()
+
+        # جوه بلوك "Arabic:" من غير نص في نفس السطر → الأسطر الأعمق تبع نفس اللغة
+        if block_lang is not None:
+            if stripped and _indent(line) > block_indent:
+                result.append(block_lang)
+                continue
+            block_lang = None
+
+        header = _LANG_HEADER.match(line)
+        if header:
+            lang = _HEADER_LANG[header.group(2)]
+            if not header.group(3).strip():
+                block_lang, block_indent = lang, _indent(line)
+            result.append(lang)
+            continue
+
+        tag = _LANG_TAG.search(line)
+        if tag and _CHANNEL_FACT.search(line):
+            result.append(None)
+            continue
+        if tag:
+            result.append(tag.group(1).lower())
+            continue
+
+        if _QUOTED.match(line):
+            lang = detect_language(stripped)
+            result.append(lang if lang in LANGUAGES else None)
+            continue
+
+        result.append(None)
+    return result
+
+
+def build_language_pack(knowledge: str, lang: str) -> str:
+    other = _OTHER[lang]
+    lines = knowledge.split("\n")
+    kept = [
+        line for line, line_lang in zip(lines, line_languages(lines))
+        if line_lang != other
+    ]
+    return "\n".join(kept)
+
+
+def build_language_packs(knowledge: str) -> Dict[str, str]:
+    """
+    {"ar": ..., "en": ..., "mixed": النص الكامل}
+    """
+    packs = {lang: build_language_pack(knowledge, lang) for lang in LANGUAGES}
+    packs["mixed"] = knowledge
+    return packs
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    تقدير تقريبي من غير API: ~4 حروف للتوكن في الإنجليزي و ~2.5 في العربي.
+    """
+    arabic = len(re.findall("[\u0600-\u06ff]", text))
+    other = len(text) - arabic
+    return int(other / 4 + arabic / 2.5)
+
+
+def pack_report(packs: Dict[str, str]) -> List[str]:
+    full = packs["mixed"]
+    full_tokens = estimate_tokens(full) or 1
+    rows = [f"{'pack':<6} {'chars':>8} {'bytes':>8} {'~tokens':>8} {'saved':>7}"]
+    for name, text in packs.items():
+        tokens = estimate_tokens(text)
+        rows.append(
+            f"{name:<6} {len(text):>8} {len(text.encode('utf-8')):>8} "
+            f"{tokens:>8} {1 - tokens / full_tokens:>7.1%}"
+        )
+    return rows
+
+
+# =========================
+# المصدر (Markdown بأقسام + tags)
+# =========================
+
+SOURCE_FILE = os.path.join("knowledge", "gp_team.md")
+SNAPSHOT_FILE = os.path.join("knowledge", "gp_team.compiled.json")
+SNAPSHOT_FORMAT = 1
+# قواعد التنسيق اللي postprocess.py بيطبقها على الرد → مش بتتبعت للموديل
+DEFAULT_EXCLUDE_TAGS = ["postprocess"]
+
+_SECTION = re.compile(r"^##\s+(.+?)\s*$")
+_TITLE = re.compile(r"^#\s+(.+?)\s*$")
+_TAGS = re.compile(r"^<!--\s*tags:\s*(.*?)\s*-->\s*$")
+_COMMENT_START = "<!--"
+_BULLET = re.compile(r"^[\s\-•*]*(?:\d+[.)]\s*)?")
+_FENCE = "```"
+_MIN_RULE_CHARS = 25
+
+
+def parse_source(text: str) -> Tuple[str, List[dict]]:
+    """
+    يرجع (title, sections) وكل section = {"title", "tags", "lines"}.
+    """
+    title = ""
+    sections: List[dict] = []
+    in_comment = False
+    current: Optional[dict] = None
+
+    for line in text.split("\n"):
+        if current is None:
+            # تعليقات الملف (قبل أول قسم) مش جزء من المعلومات
+            if in_comment or line.strip().startswith(_COMMENT_START):
+                in_comment = "-->" not in line
+                continue
+            m = _TITLE.match(line)
+            if m:
+                title = m.group(1)
+                continue
+
+        m = _SECTION.match(line)
+        if m:
+            current = {"title": m.group(1), "tags": [], "lines": []}
+            sections.append(current)
+            continue
+        if current is None:
+            continue
+
+        m = _TAGS.match(line)
+        if m and not current["lines"]:
+            current["tags"] = [t.strip() for t in m.group(1).split(",") if t.strip()]
+            continue
+        current["lines"].append(line.rstrip())
+
+    return title, sections
+
+
+def _rule_key(line: str) -> Optional[str]:
+    key = normalize(_BULLET.sub("", line))
+    return key if len(key) >= _MIN_RULE_CHARS else None
+
+
+def dedupe_rules(sections: List[dict]) -> int:
+    """
+    يشيل القواعد المكررة حرفيًا بين الأقسام (بعد التطبيع). يرجع عدد الأسطر اللي اتشالت.
+    الأسطر جوه code blocks ما بتتلمسش.
+    """
+    seen = set()
+    removed = 0
+    for section in sections:
+        kept = []
+        in_fence = False
+        for line in section["lines"]:
+            if line.strip().startswith(_FENCE):
+                in_fence = not in_fence
+            key = None if in_fence else _rule_key(line)
+            if key is not None and key in seen:
+                removed += 1
+                continue
+            if key is not None:
+                seen.add(key)
+            kept.append(line)
+        section["lines"] = kept
+    return removed
+
+
+def _compact(lines: Iterable[str]) -> List[str]:
+    # سطر فاضي واحد بالكتير بين الفقرات، ومفيش أسطر فاضية في الأول / الآخر
+    out: List[str] = []
+    for line in lines:
+        if not line.strip() and (not out or not out[-1].strip()):
+            continue
+        out.append(line)
+    while out and not out[-1].strip():
+        out.pop()
+    return out
+
+
+def render(title: str, sections: List[dict]) -> str:
+    parts = [f"[{title}]"] if title else []
+    for section in sections:
+        body = _compact(section["lines"])
+        if not body:
+            continue
+        parts.append(f"\n### {section['title']}\n" + "\n".join(body))
+    parts.append("\n[END OF KNOWLEDGE]")
+    return "\n".join(parts)
+
+
+def compile_knowledge(
+    source_text: str,
+    exclude_tags: Iterable[str] = ()
+) -> dict:
+    exclude = set(exclude_tags)
+    title, sections = parse_source(source_text)
+    sections = [s for s in sections if not exclude & set(s["tags"])]
+    removed = dedupe_rules(sections)
+
+    full = render(title, sections)
+    packs = build_language_packs(full)
+
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "source_sha256": hashlib.sha256(source_text.encode("utf-8")).hexdigest(),
+        "exclude_tags": sorted(exclude),
+        "version": hashlib.sha256(full.encode("utf-8")).hexdigest()[:12],
+        "removed_duplicates": removed,
+        "sections": [
+            {
+                "title": s["title"],
+                "tags": s["tags"],
+                "chars": len("\n".join(s["lines"])),
+                "tokens": estimate_tokens("\n".join(s["lines"])),
+            }
+            for s in sections
+        ],
+        "packs": packs,
+    }
+
+
+def load_knowledge(
+    source_path: str = SOURCE_FILE,
+    snapshot_path: str = SNAPSHOT_FILE,
+    exclude_tags: Iterable[str] = DEFAULT_EXCLUDE_TAGS
+) -> dict:
+    """
+    يحمّل الـ snapshot الجاهز. لو مش موجود أو قديم (المصدر اتعدل بعده) بيبني من المصدر
+    في الذاكرة ويطبع تحذير.
+    """
+    with open(source_path, "r", encoding="utf-8") as f:
+        source_text = f.read()
+    source_sha = hashlib.sha256(source_text.encode("utf-8")).hexdigest()
+    exclude = sorted(set(exclude_tags))
+
+    if os.path.exists(snapshot_path):
+        try:
+            with open(snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if (
+                snapshot.get("format") == SNAPSHOT_FORMAT
+                and snapshot.get("source_sha256") == source_sha
+                and snapshot.get("exclude_tags") == exclude
+            ):
+                return snapshot
+        except Exception as e:
+            print(f"[KNOWLEDGE] Failed to read {snapshot_path}: {e}")
+
+    print(f"⚠️ {snapshot_path} is missing or stale, compiling {source_path} (run: python knowledge.py)")
+    return compile_knowledge(source_text, exclude)
+
+
+def save_snapshot(snapshot: dict, path: str = SNAPSHOT_FILE) -> None:
+    # نكتب في ملف مؤقت وبعدين replace → اللي بيقرا الملف عمره ما يشوفه نص مكتوب
+    # (اسم مؤقت لكل process عشان اتنين بيحفظوا في نفس الوقت ما يمسحوش ملف بعض)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def compile_file(
+    source_path: str = SOURCE_FILE,
+    snapshot_path: Optional[str] = SNAPSHOT_FILE,
+    exclude_tags: Iterable[str] = DEFAULT_EXCLUDE_TAGS
+) -> dict:
+    """
+    يبني المصدر ويحفظ الـ snapshot (لو snapshot_path مش None). بيستخدمه الـ hot reload.
+    """
+    with open(source_path, "r", encoding="utf-8") as f:
+        source_text = f.read()
+    snapshot = compile_knowledge(source_text, exclude_tags)
+    if snapshot_path:
+        save_snapshot(snapshot, snapshot_path)
+    return snapshot
+
+
+# =========================
+# التقارير
+# =========================
+
+def section_report(snapshot: dict, top: int = 20) -> List[str]:
+    sections = snapshot["sections"]
+    total = sum(s["tokens"] for s in sections) or 1
+    rows = [f"{'~tokens':>8} {'share':>6}  section [tags]"]
+    for s in sorted(sections, key=lambda s: s["tokens"], reverse=True)[:top]:
+        rows.append(
+            f"{s['tokens']:>8} {s['tokens'] / total:>6.1%}  {s['title']} [{', '.join(s['tags'])}]"
+        )
+
+    by_tag: Dict[str, int] = {}
+    for s in sections:
+        for tag in s["tags"] or ["-"]:
+            by_tag[tag] = by_tag.get(tag, 0) + s["tokens"]
+    rows.append("")
+    rows.append("by tag: " + ", ".join(
+        f"{tag}={tokens}" for tag, tokens in sorted(by_tag.items(), key=lambda kv: -kv[1])
+    ))
+    return rows
+
+
+def near_duplicate_rules(source_text: str, min_similarity: float = 0.85) -> List[Tuple[float, str, str]]:
+    """
+    قواعد متشابهة جدًا بس مش متطابقة — للمراجعة اليدوية بس (مش بتتشال أوتوماتيك).
+    """
+    from answer_cache import cosine, ngram_vector
+
+    _, sections = parse_source(source_text)
+    items: List[Tuple[str, Dict[int, float]]] = []
+    index: Dict[int, set] = {}
+    pairs = []
+    for section in sections:
+        for line in section["lines"]:
+            key = _rule_key(line)
+            if key is None:
+                continue
+            vec = ngram_vector(key)
+            candidates = set()
+            for gram in vec:
+                candidates |= index.get(gram, set())
+            for i in candidates:
+                score = cosine(vec, items[i][1])
+                if min_similarity <= score < 0.999:
+                    pairs.append((score, line.strip(), items[i][0]))
+            for gram in vec:
+                index.setdefault(gram, set()).add(len(items))
+            items.append((line.strip(), vec))
+    return sorted(pairs, reverse=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compile the GP Team knowledge base")
+    parser.add_argument("--source", default=SOURCE_FILE)
+    parser.add_argument("--out", default=SNAPSHOT_FILE)
+    parser.add_argument("--exclude-tag", action="append", default=None,
+                        help=f"شيل الأقسام اللي عليها tag معين (repeatable، الافتراضي: {DEFAULT_EXCLUDE_TAGS})")
+    parser.add_argument("--near-dups", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.source, "r", encoding="utf-8") as f:
+        source_text = f.read()
+
+    exclude_tags = DEFAULT_EXCLUDE_TAGS if args.exclude_tag is None else args.exclude_tag
+    snapshot = compile_knowledge(source_text, exclude_tags)
+    save_snapshot(snapshot, args.out)
+
+    print(f"✅ {args.out}  version {snapshot['version']}  "
+          f"({len(snapshot['sections'])} sections, {snapshot['removed_duplicates']} duplicate rules removed)")
+    print(f"source: {len(source_text)} chars, ~{estimate_tokens(source_text)} tokens\n")
+    for row in pack_report(snapshot["packs"]):
+        print(row)
+    print()
+    for row in section_report(snapshot):
+        print(row)
+
+    if args.near_dups:
+        print("\nnear-duplicate rules (review manually):")
+        for score, a, b in near_duplicate_rules(source_text):
+            print(f"  {score:.2f}  {a[:70]}  ≈  {b[:70]}")
+
+
+if __name__ == "__main__":
+    main()
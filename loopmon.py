@@ -0,0 +1,207 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from metrics import Family, histogram, register_collector
+
+# =========================
+# Loop Lag Monitor: مين بيوقف الـ event loop
+# =========================
+# - sampler: task بتنام interval وتقيس اتأخرت قد إيه (drift) → histogram
+# - watchdog: thread لو الـ loop ما نبضش من أكتر من threshold بياخد stack الـ loop thread
+#   وهو واقف، وبيسجل أعمق سطر من كود المشروع (bot.py / core.py ...) كـ "call site"
+# - لما الـ stall يخلص الـ sampler بيعرف طوله وبيحسبه على الـ call site ده
+# Opt-in: LOOP_MONITOR=1 في .env (LOOP_LAG_THRESHOLD_MS للحد، الافتراضي 100)
+
+LAG_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+LOOP_LAG_SECONDS = histogram(
+    "gp_loop_lag_seconds",
+    "Event loop lag (sampler drift)",
+    buckets=[b / 1000 for b in LAG_BUCKETS_MS],
+)
+
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+_THIS_FILE = os.path.abspath(__file__)
+
+
+def _call_site(frames: List[traceback.FrameSummary]) -> Tuple[str, str]:
+    """
+    (أعمق سطر من كود المشروع، أعمق سطر خالص) — الأول هو المفتاح، التاني للتفاصيل.
+    """
+    innermost = frames[-1] if frames else None
+    detail = (
+        f"{os.path.basename(innermost.filename)}:{innermost.lineno} in {innermost.name}"
+        if innermost else "?"
+    )
+    for frame in reversed(frames):
+        path = os.path.abspath(frame.filename)
+        if path.startswith(_PROJECT_DIR) and path != _THIS_FILE:
+            site = f"{os.path.relpath(path, _PROJECT_DIR)}:{frame.lineno} in {frame.name}"
+            return site, detail
+    return detail, detail
+
+
+class SiteStats:
+    def __init__(self, detail: str):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.detail = detail
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.25, threshold: float = 0.1, log: bool = True):
+        self.interval = interval
+        self.threshold = threshold       # lag أكبر من كده = stall (بيتسجل مكانه)
+        self.log = log
+        self.buckets: Counter = Counter()
+        self.samples = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.stalls = 0
+        self.sites: Dict[str, SiteStats] = {}
+        self.started_at = 0.0
+        self._heartbeat = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self._captured: Optional[Tuple[str, str]] = None   # الـ stall الحالي (من الـ watchdog)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    # ---------- تشغيل ----------
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self.started_at = time.time()
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+        threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self.buckets.clear()
+            self.samples = 0
+            self.lag_total = 0.0
+            self.lag_max = 0.0
+            self.stalls = 0
+            self.sites.clear()
+            self.started_at = time.time()
+
+    # ---------- sampler (على الـ loop) ----------
+
+    async def _sample(self) -> None:
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            self._record(max(0.0, now - before - self.interval))
+
+    def _record(self, lag: float) -> None:
+        LOOP_LAG_SECONDS.observe(lag)
+        lag_ms = lag * 1000
+        bucket = next((b for b in LAG_BUCKETS_MS if lag_ms <= b), None)
+        with self._lock:
+            self.samples += 1
+            self.lag_total += lag
+            self.lag_max = max(self.lag_max, lag)
+            self.buckets[bucket] += 1      # None = أكبر من آخر bucket
+            captured, self._captured = self._captured, None
+            if lag < self.threshold:
+                return
+            self.stalls += 1
+            site, detail = captured or ("(not captured)", "")
+            stats = self.sites.get(site)
+            if stats is None:
+                stats = self.sites[site] = SiteStats(detail)
+            stats.count += 1
+            stats.total += lag
+            stats.max = max(stats.max, lag)
+        if self.log:
+            print(f"[LOOP LAG] blocked {lag_ms:.0f} ms at {site}" + (f" → {detail}" if detail != site else ""))
+
+    # ---------- watchdog (thread) ----------
+
+    def _watchdog(self) -> None:
+        check_every = max(0.01, self.threshold / 4)
+        while not self._stop.wait(check_every):
+            stalled_for = time.monotonic() - self._heartbeat - self.interval
+            if stalled_for < self.threshold or self._captured is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            site = _call_site(traceback.extract_stack(frame))
+            with self._lock:
+                # أول capture في الـ stall ده بس (الـ sampler بيمسحه لما الـ loop يرجع)
+                if self._captured is None:
+                    self._captured = site
+
+    # ---------- تقرير ----------
+
+    def histogram(self) -> List[Tuple[str, int]]:
+        with self._lock:
+            rows = [(f"≤{b} ms", self.buckets.get(b, 0)) for b in LAG_BUCKETS_MS]
+            rows.append((f">{LAG_BUCKETS_MS[-1]} ms", self.buckets.get(None, 0)))
+        return rows
+
+    def top_sites(self, limit: int = 5) -> List[Tuple[str, SiteStats]]:
+        with self._lock:
+            return sorted(self.sites.items(), key=lambda kv: kv[1].total, reverse=True)[:limit]
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "samples": self.samples,
+                "lag_avg": self.lag_total / self.samples if self.samples else 0.0,
+                "lag_max": self.lag_max,
+                "stalls": self.stalls,
+                "since": self.started_at,
+            }
+
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR", "").strip().lower() in ("1", "true", "yes")
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100") or 100) / 1000
+
+_monitor: Optional[LoopLagMonitor] = None
+
+
+def loop_monitor() -> Optional[LoopLagMonitor]:
+    return _monitor
+
+
+def start_loop_monitor() -> Optional[LoopLagMonitor]:
+    """
+    يشغّل الـ monitor على الـ loop الحالي لو LOOP_MONITOR مفعّل (مرة واحدة بس).
+    """
+    global _monitor
+    if not LOOP_MONITOR_ENABLED:
+        return None
+    if _monitor is None:
+        _monitor = LoopLagMonitor(threshold=LOOP_LAG_THRESHOLD)
+        _monitor.start()
+        register_collector("loop", _loop_metrics)
+        print(f"⏱️ Loop lag monitor on (threshold {LOOP_LAG_THRESHOLD * 1000:.0f} ms)")
+    return _monitor
+
+
+def _loop_metrics():
+    sites = _monitor.top_sites(limit=20)
+    yield Family("gp_loop_stalls_total", "counter", "Event loop stalls above the threshold",
+                 [({}, _monitor.summary()["stalls"])])
+    yield Family("gp_loop_stall_seconds_total", "counter", "Event loop time blocked per call site",
+                 [({"site": site}, st.total) for site, st in sites])
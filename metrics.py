@@ -0,0 +1,260 @@
+import asyncio
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+# =========================
+# Metrics (Prometheus text format) من غير أي dependency
+# =========================
+# - Counter / Histogram بـ labels، آمنين بين الـ threads (الـ loop + الـ executors)
+# - collectors: دوال بتتنادى وقت الـ scrape وبترجع أرقام من الإحصائيات الموجودة
+#   (الـ scheduler، الـ router، الكاش، الـ executors ...) بدل ما نكررها
+# - الـ HTTP server في thread لوحده → الـ scrape ما بيلمسش الـ event loop
+# - METRICS_PORT في .env (مش متحدد = مقفول). worker رقم i بياخد METRICS_PORT + 1 + i
+#
+# الوقت في كل مرحلة: gp_stage_seconds{stage, model, outcome}
+#   outcome: ok | blocked | error | safety | cancelled (الرسالة اتمسحت / اتعدلت)
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [counts لكل bucket (مش تراكمي)..., +Inf, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound) if bound != float("inf") else "+Inf"}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {_number(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {_number(cumulative)}")
+        return lines
+
+
+class Family(NamedTuple):
+    """
+    اللي الـ collector بيرجعه: اسم + نوع (gauge / counter) + قيم بالـ labels
+    """
+    name: str
+    kind: str
+    help: str
+    samples: List[Tuple[Dict[str, str], float]]
+
+
+Collector = Callable[[], Iterable[Family]]
+
+_metrics: List = []
+_collectors: Dict[str, Collector] = {}
+_registry_lock = threading.Lock()
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    metric = Counter(name, help, labelnames)
+    with _registry_lock:
+        _metrics.append(metric)
+    return metric
+
+
+def histogram(
+    name: str,
+    help: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    metric = Histogram(name, help, labelnames, buckets)
+    with _registry_lock:
+        _metrics.append(metric)
+    return metric
+
+
+def register_collector(name: str, collector: Collector) -> None:
+    # نفس الاسم تاني → بيستبدل القديم (reload / tests)
+    with _registry_lock:
+        _collectors[name] = collector
+
+
+def render() -> str:
+    with _registry_lock:
+        metrics = list(_metrics)
+        collectors = list(_collectors.items())
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for name, collector in collectors:
+        try:
+            families = list(collector())
+        except Exception as e:
+            # الإحصائيات بتتقرا من thread تاني وهي بتتغير → نفوّت الـ collector ده المرة دي
+            lines.append(f"# collector {name} failed: {type(e).__name__}")
+            continue
+        for family in families:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for labels, value in family.samples:
+                names = sorted(labels)
+                lines.append(f"{family.name}{_labels(names, [labels[n] for n in names])} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# =========================
+# الوقت في كل مرحلة
+# =========================
+
+STAGE_SECONDS = histogram(
+    "gp_stage_seconds",
+    "Time spent in each request stage",
+    ("stage", "model", "outcome"),
+)
+
+
+def observe_stage(stage: str, seconds: float, model: str = "", outcome: str = "ok") -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage, model=model, outcome=outcome)
+
+
+class StageTimer:
+    def __init__(self, stage: str, model: str):
+        self.stage = stage
+        self.model = model
+        self.outcome = "ok"
+
+
+@contextmanager
+def stage_timer(stage: str, model: str = "") -> Iterator[StageTimer]:
+    """
+    with stage_timer("gemini_call", model=name) as t: ... ; t.outcome = "safety"
+    أي exception → outcome = error، والإلغاء → cancelled (وبيترموا عادي).
+    """
+    timer = StageTimer(stage, model)
+    started = time.perf_counter()
+    try:
+        yield timer
+    except asyncio.CancelledError:
+        timer.outcome = "cancelled"
+        raise
+    except BaseException:
+        timer.outcome = "error"
+        raise
+    finally:
+        STAGE_SECONDS.observe(
+            time.perf_counter() - started, stage=timer.stage, model=timer.model, outcome=timer.outcome
+        )
+
+
+# =========================
+# HTTP endpoint
+# =========================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # كل scrape في اللوج كتير
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def metrics_port(offset: int = 0) -> Optional[int]:
+    port = int(os.getenv("METRICS_PORT", "0") or 0)
+    return port + offset if port else None
+
+
+def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None) -> Optional[ThreadingHTTPServer]:
+    """
+    يشغّل /metrics في daemon thread (مرة واحدة). port=None → من METRICS_PORT (مقفول لو مش متحدد).
+    """
+    global _server
+    port = port if port is not None else metrics_port()
+    if not port or _server is not None:
+        return _server
+    host = host or os.getenv("METRICS_HOST", "127.0.0.1")
+    try:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        print(f"[METRICS] Failed to listen on {host}:{port}: {e}")
+        return None
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{port}/metrics")
+    return _server
@@ -0,0 +1,106 @@
+"""
+استخراج الأسئلة الشائعة من سجل البوت (offline) وكتابتها في faq.json.
+
+الاستخدام:
+    python mine_faq.py --log ai_log.jsonl --top 15 --out faq.json
+
+الأسئلة اللي من غير تاريخ محادثة بتتجمع في clusters (نفس المفتاح أو cosine
+similarity عالية على char n-grams — نفس طريقة answer_cache)، وأكبر clusters
+في كل لغة بتتكتب بأكتر صيغة اتكررت فيها.
+"""
+import argparse
+import json
+from collections import Counter
+from typing import Dict, List
+
+from answer_cache import canonical_key, cosine, ngram_vector, same_question
+from textproc import dominant_language
+
+# الرسائل دي اترد عليها من غير موديل فمالهاش لازمة في الـ warm-up
+SKIPPED_SOURCES = {"quick", "offtopic", "error"}
+
+
+class Cluster:
+    def __init__(self, key: str):
+        self.key = key
+        self.vector = ngram_vector(key)
+        self.phrasings: Counter = Counter()
+
+    @property
+    def size(self) -> int:
+        return sum(self.phrasings.values())
+
+    def representative(self) -> str:
+        return self.phrasings.most_common(1)[0][0]
+
+
+def load_questions(paths: List[str]) -> List[str]:
+    questions = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                item = json.loads(line)
+                if item.get("history_len", 0) or item.get("source") in SKIPPED_SOURCES:
+                    continue
+                questions.append(item["question"].strip())
+    return questions
+
+
+def cluster_questions(questions: List[str], min_similarity: float) -> List[Cluster]:
+    by_key: Dict[str, Cluster] = {}
+    for q in questions:
+        key = canonical_key(q)
+        if not key:
+            continue
+        cluster = by_key.get(key)
+        if cluster is None:
+            cluster = by_key[key] = Cluster(key)
+        cluster.phrasings[q] += 1
+
+    # دمج الـ clusters المتشابهة (الأكبر بيبلع الأصغر)
+    merged: List[Cluster] = []
+    for cluster in sorted(by_key.values(), key=lambda c: c.size, reverse=True):
+        for target in merged:
+            if cosine(cluster.vector, target.vector) >= min_similarity and same_question(cluster.key, target.key):
+                target.phrasings.update(cluster.phrasings)
+                break
+        else:
+            merged.append(cluster)
+
+    return sorted(merged, key=lambda c: c.size, reverse=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mine frequent questions into faq.json")
+    parser.add_argument("--log", action="append", required=True, help="bot AI log JSONL (repeatable)")
+    parser.add_argument("--out", default="faq.json")
+    parser.add_argument("--top", type=int, default=15, help="عدد الأسئلة لكل لغة")
+    parser.add_argument("--min-count", type=int, default=3, help="أقل عدد تكرار عشان السؤال يدخل")
+    parser.add_argument("--min-similarity", type=float, default=0.85)
+    args = parser.parse_args()
+
+    questions = load_questions(args.log)
+    clusters = cluster_questions(questions, args.min_similarity)
+    print(f"Questions: {len(questions)} → clusters: {len(clusters)}")
+
+    faq: Dict[str, List[str]] = {"ar": [], "en": []}
+    for cluster in clusters:
+        if cluster.size < args.min_count:
+            break
+        question = cluster.representative()
+        lang = dominant_language(question)
+        if len(faq[lang]) >= args.top:
+            continue
+        faq[lang].append(question)
+        print(f"  [{lang}] {cluster.size:>5}×  {question}")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(faq, f, ensure_ascii=False, indent=2)
+    print(f"✅ Wrote {len(faq['ar'])} Arabic + {len(faq['en'])} English questions to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import itertools
+import json
+import math
+import os
+import random
+import zlib
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from textproc import dominant_language, normalize
+
+# =========================
+# Off-topic classifier (Hashing TF-IDF + Logistic Regression)
+# =========================
+# - مفيش أي dependency: كله Python عادي وبيشتغل على الـ CPU في أقل من ملّي ثانية
+# - الـ features: كلمات + أزواج كلمات + char n-grams (3..5) على النص بعد التطبيع
+# - crc32 بدل hash() عشان الـ hash ثابت بين البروسيسات
+# - الموديل بيتدرب offline بـ train_offtopic.py وبيتحفظ JSON
+
+DEFAULT_DIM = 1 << 18
+CHAR_NGRAMS = (3, 4, 5)
+
+
+def _bucket(feature: str, dim: int) -> int:
+    return zlib.crc32(feature.encode("utf-8")) % dim
+
+
+def extract_features(text: str, dim: int = DEFAULT_DIM) -> Dict[int, float]:
+    """
+    يرجع sparse vector: bucket -> term frequency (log-scaled)
+    """
+    words = normalize(text).split()
+    counts: Dict[int, float] = {}
+
+    def add(feature: str) -> None:
+        b = _bucket(feature, dim)
+        counts[b] = counts.get(b, 0.0) + 1.0
+
+    for w in words:
+        add("w:" + w)
+        padded = f" {w} "
+        for n in CHAR_NGRAMS:
+            for i in range(len(padded) - n + 1):
+                add("c:" + padded[i:i + n])
+    for a, b in zip(words, words[1:]):
+        add(f"b:{a} {b}")
+
+    return {k: 1.0 + math.log(v) for k, v in counts.items()}
+
+
+def _l2_normalize(vec: Dict[int, float]) -> Dict[int, float]:
+    norm = math.sqrt(sum(v * v for v in vec.values()))
+    if norm == 0:
+        return vec
+    return {k: v / norm for k, v in vec.items()}
+
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+class OffTopicClassifier:
+    """
+    predict_proba(text) → احتمال إن الرسالة مالهاش علاقة بـ GP Team.
+    """
+
+    def __init__(
+        self,
+        weights: Dict[int, float],
+        bias: float,
+        idf: Dict[int, float],
+        default_idf: float,
+        threshold: float,
+        dim: int = DEFAULT_DIM,
+    ):
+        self.weights = weights
+        self.bias = bias
+        self.idf = idf
+        self.default_idf = default_idf
+        self.threshold = threshold
+        self.dim = dim
+
+    # ---------- features ----------
+
+    def vectorize(self, text: str) -> Dict[int, float]:
+        tf = extract_features(text, self.dim)
+        return _l2_normalize({
+            k: v * self.idf.get(k, self.default_idf) for k, v in tf.items()
+        })
+
+    def predict_proba(self, text: str) -> float:
+        vec = self.vectorize(text)
+        z = self.bias + sum(self.weights.get(k, 0.0) * v for k, v in vec.items())
+        return _sigmoid(z)
+
+    def is_off_topic(self, text: str) -> bool:
+        return self.predict_proba(text) >= self.threshold
+
+    # ---------- training ----------
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[int],
+        epochs: int = 8,
+        learning_rate: float = 0.5,
+        l2: float = 1e-5,
+        threshold: float = 0.9,
+        dim: int = DEFAULT_DIM,
+        seed: int = 13,
+    ) -> "OffTopicClassifier":
+        """
+        labels: 1 = off-topic، 0 = GP Team
+        SGD بسيط على logistic loss مع L2.
+        """
+        tfs = [extract_features(t, dim) for t in texts]
+
+        df: Dict[int, int] = {}
+        for tf in tfs:
+            for k in tf:
+                df[k] = df.get(k, 0) + 1
+        n = len(tfs)
+        idf = {k: math.log((1 + n) / (1 + c)) + 1.0 for k, c in df.items()}
+        default_idf = math.log(1 + n) + 1.0
+
+        model = cls({}, 0.0, idf, default_idf, threshold, dim)
+        vectors = [
+            _l2_normalize({k: v * idf[k] for k, v in tf.items()}) for tf in tfs
+        ]
+
+        order = list(range(n))
+        rng = random.Random(seed)
+        weights = model.weights
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            lr = learning_rate / (1 + epoch)
+            for i in order:
+                vec, y = vectors[i], labels[i]
+                z = model.bias + sum(weights.get(k, 0.0) * v for k, v in vec.items())
+                g = _sigmoid(z) - y
+                model.bias -= lr * g
+                for k, v in vec.items():
+                    w = weights.get(k, 0.0)
+                    weights[k] = w - lr * (g * v + l2 * w)
+
+        # شيل الأوزان الصغيرة جدًا عشان الملف يبقى صغير
+        model.weights = {k: w for k, w in weights.items() if abs(w) > 1e-4}
+        return model
+
+    # ---------- save / load ----------
+
+    def to_dict(self) -> dict:
+        return {
+            "dim": self.dim,
+            "bias": self.bias,
+            "threshold": self.threshold,
+            "default_idf": self.default_idf,
+            "weights": {str(k): round(w, 6) for k, w in self.weights.items()},
+            "idf": {str(k): round(v, 4) for k, v in self.idf.items()},
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["OffTopicClassifier"]:
+        """
+        يرجع None لو الملف مش موجود أو بايظ (الكلاسيفاير ببساطة بيتقفل).
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(
+                weights={int(k): w for k, w in data["weights"].items()},
+                bias=data["bias"],
+                idf={int(k): v for k, v in data["idf"].items()},
+                default_idf=data["default_idf"],
+                threshold=data["threshold"],
+                dim=data["dim"],
+            )
+        except Exception as e:
+            print(f"[OFFTOPIC] Failed to load model {path}: {e}")
+            return None
+
+
+# =========================
+# التقييم
+# =========================
+
+def precision_recall(
+    probs: Iterable[float],
+    labels: Iterable[int],
+    threshold: float
+) -> Tuple[float, float, float]:
+    """
+    يرجع (precision, recall, coverage) لكلاس الـ off-topic عند threshold معين.
+    coverage = نسبة الرسائل اللي هتترفض محليًا.
+    """
+    tp = fp = fn = total = 0
+    for p, y in zip(probs, labels):
+        total += 1
+        predicted = p >= threshold
+        if predicted and y:
+            tp += 1
+        elif predicted and not y:
+            fp += 1
+        elif not predicted and y:
+            fn += 1
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    coverage = (tp + fp) / total if total else 0.0
+    return precision, recall, coverage
+
+
+# =========================
+# الرفض الجاهز
+# =========================
+
+_REFUSALS = {
+    "ar": [
+        "عذرًا، أنا مخصص فقط للإجابة عن أسئلة **GP Team** وخدماتها. لو عندك سؤال عن خدماتنا أو طريقة الطلب أنا جاهز! 🙂",
+        "السؤال ده خارج نطاق **GP Team**، أقدر أساعدك في أي حاجة تخص خدماتنا أو القوانين أو الطلبات.",
+    ],
+    "en": [
+        "Sorry, I can only help with questions about **GP Team** and its services. Feel free to ask about our services or how to order! 🙂",
+        "That's outside what I can help with — I'm the **GP Team** assistant. Ask me anything about our services, rules, or orders.",
+    ],
+}
+_REFUSAL_ROTATION = {lang: itertools.cycle(r) for lang, r in _REFUSALS.items()}
+
+
+def refusal_reply(text: str) -> str:
+    return next(_REFUSAL_ROTATION[dominant_language(text)])
@@ -0,0 +1,196 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+# =========================
+# Outbox: طابور الإرسال لـ Discord (لكل bucket)
+# =========================
+# - كل bucket (قناة / DM) ليه worker واحد بيبعت بالترتيب → الرسائل ما بتتزاحمش على نفس
+#   rate limit، والـ handler بيحط الرسالة في الطابور ويرجع على طول بدل ما يستنى الـ 429
+# - الرسائل اللي ليها merge: كل اللي مستني في نفس الـ bucket ومن نفس النوع بيتبعت في
+#   رسالة واحدة (تحذيرات AutoMod وقت موجة سبام)
+# - max_age: الرسالة اللي استنت أكتر من كده بتتشال (تحذير قديم مالوش لازمة)
+# - الـ worker بيقفل لوحده لما الـ bucket يفضى idle_seconds
+
+
+@dataclass
+class OutboundItem:
+    kind: str
+    send: Optional[Callable[[], Awaitable[Any]]] = None
+    payload: Any = None
+    merge: Optional[Callable[[List[Any]], Awaitable[Any]]] = None
+    max_age: Optional[float] = None
+    created_at: float = 0.0
+    future: Optional[asyncio.Future] = field(default=None, repr=False)
+
+
+@dataclass
+class OutboxStats:
+    queued: int = 0
+    sent: int = 0            # عمليات إرسال فعلية
+    merged: int = 0          # رسائل اتدمجت في رسالة تانية
+    dropped_stale: int = 0
+    errors: int = 0
+    max_delay: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "queued": self.queued,
+            "sent": self.sent,
+            "merged": self.merged,
+            "dropped_stale": self.dropped_stale,
+            "errors": self.errors,
+            "max_delay": self.max_delay,
+        }
+
+
+class Outbox:
+    def __init__(
+        self,
+        max_pending: int = 200,
+        idle_seconds: float = 30.0,
+        clock=time.monotonic,
+    ):
+        self.max_pending = max_pending     # لكل bucket — الأقدم بيتشال لو اتملى
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self._queues: Dict[Hashable, Deque[OutboundItem]] = {}
+        self._wakeups: Dict[Hashable, asyncio.Event] = {}
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+        self.stats: Dict[str, OutboxStats] = {}
+
+    def _stats(self, kind: str) -> OutboxStats:
+        stats = self.stats.get(kind)
+        if stats is None:
+            stats = self.stats[kind] = OutboxStats()
+        return stats
+
+    def pending(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    # ---------- API ----------
+
+    def submit(
+        self,
+        bucket: Hashable,
+        send: Callable[[], Awaitable[Any]],
+        kind: str = "message",
+        max_age: Optional[float] = None,
+    ) -> asyncio.Future:
+        """
+        يحط رسالة في طابور الـ bucket ويرجع Future بنتيجة الإرسال (ممكن ما يتستناش).
+        """
+        return self._enqueue(bucket, OutboundItem(kind=kind, send=send, max_age=max_age))
+
+    def submit_mergeable(
+        self,
+        bucket: Hashable,
+        kind: str,
+        payload: Any,
+        merge: Callable[[List[Any]], Awaitable[Any]],
+        max_age: Optional[float] = None,
+    ) -> asyncio.Future:
+        """
+        كل الـ payloads المستنية من نفس النوع في الـ bucket بتتبعت مرة واحدة: merge(payloads).
+        """
+        return self._enqueue(
+            bucket, OutboundItem(kind=kind, payload=payload, merge=merge, max_age=max_age)
+        )
+
+    # ---------- internal ----------
+
+    def _enqueue(self, bucket: Hashable, item: OutboundItem) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        item.created_at = self.clock()
+        item.future = loop.create_future()
+
+        queue = self._queues.setdefault(bucket, deque())
+        if len(queue) >= self.max_pending:
+            dropped = queue.popleft()
+            self._drop(dropped)
+        queue.append(item)
+        self._stats(item.kind).queued += 1
+
+        wakeup = self._wakeups.setdefault(bucket, asyncio.Event())
+        wakeup.set()
+        worker = self._workers.get(bucket)
+        if worker is None or worker.done():
+            self._workers[bucket] = loop.create_task(self._run(bucket))
+        return item.future
+
+    def _drop(self, item: OutboundItem) -> None:
+        stats = self._stats(item.kind)
+        stats.queued -= 1
+        stats.dropped_stale += 1
+        if not item.future.done():
+            item.future.set_result(None)
+
+    def _take_batch(self, queue: Deque[OutboundItem], now: float) -> List[OutboundItem]:
+        # أول رسالة لسه صالحة + (لو قابلة للدمج) كل اللي من نوعها في الطابور
+        while queue:
+            head = queue.popleft()
+            if head.max_age is not None and now - head.created_at > head.max_age:
+                self._drop(head)
+                continue
+            if head.merge is None:
+                return [head]
+
+            batch = [head]
+            for item in list(queue):
+                if item.kind != head.kind or item.merge is None:
+                    continue
+                queue.remove(item)
+                if item.max_age is not None and now - item.created_at > item.max_age:
+                    self._drop(item)
+                else:
+                    batch.append(item)
+            return batch
+        return []
+
+    async def _run(self, bucket: Hashable) -> None:
+        queue = self._queues[bucket]
+        wakeup = self._wakeups[bucket]
+        while True:
+            if not queue:
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.idle_seconds)
+                except asyncio.TimeoutError:
+                    if not queue:
+                        self._queues.pop(bucket, None)
+                        self._wakeups.pop(bucket, None)
+                        self._workers.pop(bucket, None)
+                        return
+                continue
+
+            now = self.clock()
+            batch = self._take_batch(queue, now)
+            if not batch:
+                continue
+
+            head = batch[0]
+            stats = self._stats(head.kind)
+            stats.queued -= len(batch)
+            stats.merged += len(batch) - 1
+            stats.max_delay = max(stats.max_delay, now - head.created_at)
+            try:
+                if head.merge is not None:
+                    result = await head.merge([item.payload for item in batch])
+                else:
+                    result = await head.send()
+                stats.sent += 1
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_result(result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stats.errors += 1
+                print(f"[OUTBOX] {head.kind} to {bucket} failed: {e}")
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+                        # محدش لازم يستنى الـ Future → نعلّم الـ exception إنه اتشاف
+                        item.future.exception()
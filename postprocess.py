@@ -0,0 +1,282 @@
+import re
+from collections import Counter
+from typing import Callable, List, Tuple
+
+# =========================
+# Post-processing لردود الموديل (قواعد التنسيق)
+# =========================
+# قواعد التنسيق اللي كانت في البرومبت (ما تكتبش لينك جوه `` أو ```، ما تكتبش رقم القاعدة،
+# Markdown نضيف يناسب الـ Embed) الموديل مش بيلتزم بيها دايمًا وبتكلّف توكنز في كل طلب.
+# هنا بتتطبق على الرد نفسه بـ regex متجمّعة مرة واحدة، قبل ما يتحط في الـ Embed.
+
+_URL = r"(?:https?://|discord\.gg/)[^\s`<>]+"
+_MENTION = r"<(?:#|@[!&]?)\d+>|@everyone|@here"
+_LINK = rf"(?:{_URL}|{_MENTION})"
+
+# span / block كله لينكات أو منشنز بس → يتفك. أوامر زي `bash <(curl ...)` بتفضل كود
+_LINK_LINE = re.compile(rf"[-•*]?\s*(?:[^\s`]{{1,40}}:\s*)?{_LINK}(?:\s+{_LINK})*")
+_FENCE_BLOCK = re.compile(r"```[a-zA-Z]*[ \t]*\n?(.*?)\n?[ \t]*```", re.S)
+_INLINE_LINK = re.compile(rf"(?<!`)`\s*({_LINK})\s*`(?!`)")
+
+# "according to rule 18, ..." / "(Section 17)" / "حسب القاعدة رقم 18" / "(البند 5)"
+# الهدف أرقام قواعد البرومبت بس، مش أي "rule N" في الكلام:
+# - [ \t] بدل \s عشان الحذف ما يعديش لسطر تاني
+# - "Discord ToS rule 3" / "YouTube's rules" → قواعد حد تاني، بتفضل (_FOREIGN_OWNER)
+_RULE_REF = (
+    r"(?:\b(?:rules?|sections?)[ \t]*(?:#|no\.?[ \t]*|number[ \t]*)?\d+[a-z]?\b"
+    r"|(?:ال)?(?:قاعدة|قاعده|قواعد|بند|البند|قسم)[ \t]*(?:رقم[ \t]*)?[#]?[0-9٠-٩]+)"
+)
+_RULE_PAREN = re.compile(rf"[ \t]*\([ \t]*(?:[^()\n]{{0,20}}?[ \t])?{_RULE_REF}[ \t]*\)", re.I)
+_RULE_LEAD = re.compile(
+    rf"\b(?:according to|as per|based on|as stated in|as mentioned in)[ \t]+{_RULE_REF}[ \t]*[,:\-–]?[ \t]*"
+    rf"|(?:حسب|وفقا ل|وفقًا ل|بناء على|بناءً على|زي ما في|كما في)[ \t]*{_RULE_REF}[ \t]*[,:،\-–]?[ \t]*",
+    re.I
+)
+# "See rule 7." جملة كاملة لوحدها بس ("Check rule 5 before posting." جملة عادية وبتفضل)
+_RULE_SEE = re.compile(
+    rf"(?:(?<=[.!?؟])|^)[ \t]*(?:see|check)[ \t]+{_RULE_REF}[ \t]*[.!](?=[ \t]|$)",
+    re.I | re.M
+)
+# "Rule 1: No spam." / "- القاعدة 5: ممنوع السبام." → العنوان بيتشال والقاعدة نفسها بتفضل
+_RULE_LABEL = re.compile(
+    rf"^([ \t]*(?:[-•*][ \t]*|\d+[.)][ \t]*)?){_RULE_REF}[ \t]*[:\-–][ \t]*(?=\S)",
+    re.I | re.M
+)
+# من غير سياق: "…, rule 18." / "…، القاعدة 18" (مفرد بس) مضافة في آخر الجملة بعد فاصلة أو شرطة.
+# الكلمة اللي قبلها ما بتتشالش أبدًا ("5$ per rule 3." / "rule 3 forbids" كلام عادي)
+_RULE_BARE = re.compile(
+    r"[ \t]*[,،\-–—][ \t]*"
+    r"(?:\brule[ \t]*(?:#|no\.?[ \t]*|number[ \t]*)?\d+[a-z]?\b|(?:ال)?(?:قاعدة|قاعده)[ \t]*(?:رقم[ \t]*)?#?[0-9٠-٩]+)"
+    r"(?=[ \t]*(?:[.;!?؛)]|$))",
+    re.I | re.M
+)
+_FOREIGN = r"\b(?:discord|tos|terms|guidelines|youtube|twitch|github|google|law)\b"
+_FOREIGN_WORD = re.compile(_FOREIGN, re.I)
+_FOREIGN_OWNER = re.compile(_FOREIGN + r"(?:'s)?[ \t]*$", re.I)
+
+# الكود (``` ... ``` أو `...`) ما بيتلمسش
+_CODE = re.compile(r"```.*?(?:```|\Z)|`[^`\n]+`", re.S)
+_PLACEHOLDER = 0xE000        # Unicode private use: حرف واحد مكان كل span كود
+_PLACEHOLDERS = re.compile("[\ue000-\uf8ff]")
+
+_TRAILING_SPACES = re.compile(r"[ \t]+$", re.M)
+_BR = re.compile(r"<br\s*/?>", re.I)
+_HEADING = re.compile(r"^(#{1,2}|#{4,})\s+(?=\S)", re.M)
+_BLANK_LINES = re.compile(r"\n{3,}")
+_SPACE_BEFORE_PUNCT = re.compile(r"[ \t]+([,.:;!?،؛])")
+_DOUBLE_SPACES = re.compile(r"(?<=\S)[ \t]{2,}(?=\S)")
+
+
+def _unwrap_fence(match: "re.Match") -> str:
+    lines = [ln.strip() for ln in match.group(1).split("\n") if ln.strip()]
+    if lines and all(_LINK_LINE.fullmatch(ln) for ln in lines):
+        return "\n".join(lines)
+    return match.group(0)
+
+
+def unwrap_links(text: str) -> str:
+    text = _FENCE_BLOCK.sub(_unwrap_fence, text)
+    return _INLINE_LINK.sub(r"\1", text)
+
+
+def _tidy_line_starts(text: str, original: str) -> str:
+    # بس السطور اللي اتغيرت: المسافة اللي فضلت في أولها بتتشال، والحرف الأول يبقى capital
+    # لو أول السطر اتشال ("according to rule 18, you ..." → "You ...")
+    lines = text.split("\n")
+    for i, (line, before) in enumerate(zip(lines, original.split("\n"))):
+        if line == before:
+            continue
+        indent = before[:len(before) - len(before.lstrip())]
+        body = line.lstrip()
+        if body[:1].islower() and not before.lstrip().startswith(body[:1]):
+            body = body[0].upper() + body[1:]
+        lines[i] = indent + body
+    return "\n".join(lines)
+
+
+def _own_rule(match: "re.Match") -> str:
+    # "Discord ToS rule 3" / "(YouTube rule 2)" → مش قواعدنا، بتفضل
+    if _FOREIGN_OWNER.search(match.string, 0, match.start()) or _FOREIGN_WORD.search(match.group(0)):
+        return match.group(0)
+    return ""
+
+
+def _own_label(match: "re.Match") -> str:
+    return match.group(0) if _FOREIGN_WORD.search(match.group(0)) else match.group(1)
+
+
+def strip_rule_numbers(text: str) -> str:
+    cleaned = _RULE_LABEL.sub(_own_label, text)
+    cleaned = _RULE_PAREN.sub(_own_rule, cleaned)
+    cleaned = _RULE_LEAD.sub(_own_rule, cleaned)
+    cleaned = _RULE_SEE.sub(_own_rule, cleaned)
+    cleaned = _RULE_BARE.sub(_own_rule, cleaned)
+    if cleaned == text:
+        return text
+    cleaned = _SPACE_BEFORE_PUNCT.sub(r"\1", cleaned)
+    cleaned = _DOUBLE_SPACES.sub(" ", cleaned)
+    return _tidy_line_starts(cleaned, text)
+
+
+def _outside_code(text: str, fn: Callable[[str], str]) -> str:
+    """
+    fn على النص برّه الكود بس: كل span كود بيتبدل بحرف مؤقت وبيرجع بعد fn.
+    لو fn شالت حرف منهم (أو النص فيه الحروف دي أصلًا) النص بيرجع زي ما هو.
+    """
+    if _PLACEHOLDERS.search(text):
+        return text
+    spans: List[str] = []
+
+    def _hide(match: "re.Match") -> str:
+        spans.append(match.group(0))
+        return chr(_PLACEHOLDER + len(spans) - 1)
+
+    masked = _CODE.sub(_hide, text)
+    if not spans:
+        return fn(text)
+    result = fn(masked)
+    if len(_PLACEHOLDERS.findall(result)) != len(spans):
+        return text
+    return _PLACEHOLDERS.sub(lambda m: spans[ord(m.group(0)) - _PLACEHOLDER], result)
+
+
+def _close_markers(text: str) -> str:
+    # الرد ممكن يتقطع (MAX_TOKENS) في نص code block أو bold
+    if text.count("```") % 2:
+        text += "\n```"
+    outside = "".join(text.split("```")[0::2])
+    if outside.count("**") % 2:
+        idx = text.rfind("**")
+        text = text[:idx] + text[idx + 2:]
+    return text
+
+
+def normalize_markdown(text: str) -> str:
+    text = text.replace("\r\n", "\n")
+    text = _BR.sub("\n", text)
+    text = _TRAILING_SPACES.sub("", text)
+    # Discord بيعرض # / ## كبار جدًا و #### مش مدعوم → كله ###
+    text = _outside_code(text, lambda s: _HEADING.sub("### ", s))
+    text = _BLANK_LINES.sub("\n\n", text)
+    return _close_markers(text.strip())
+
+
+# الترتيب مهم: فك اللينكات قبل ما الـ markdown يتظبط
+REWRITERS: List[Tuple[str, Callable[[str], str]]] = [
+    ("links", unwrap_links),
+    ("rule_numbers", lambda t: _outside_code(t, strip_rule_numbers)),
+    ("markdown", normalize_markdown),
+]
+
+# عدد المرات اللي كل rewriter غيّر فيها رد (بيبان في /aistats)
+REWRITE_COUNTS: Counter = Counter()
+
+
+def postprocess_traced(text: str) -> Tuple[str, List[str]]:
+    """
+    الرد بعد التعديل + أسماء الـ rewriters اللي غيّرت فيه
+    (بيشتغل في process تانية لو STAGE_PROCESSES > 0، فالعدّ بيحصل عند اللي نادى).
+    """
+    changed = []
+    for name, rewrite in REWRITERS:
+        new_text = rewrite(text)
+        if new_text != text:
+            changed.append(name)
+            text = new_text
+    return text, changed
+
+
+def postprocess_answer(text: str) -> str:
+    text, changed = postprocess_traced(text)
+    REWRITE_COUNTS.update(changed)
+    return text
+
+
+# =========================
+# تقسيم الردود الطويلة لصفحات (بدل ما نقص عند 4000 حرف)
+# =========================
+
+_FENCE_OPEN = re.compile(r"^\s*```(\w*)")
+
+
+def _blocks(text: str) -> List[str]:
+    """
+    فقرات مفصولة بسطر فاضي، والـ code block بيفضل بلوك واحد حتى لو جواه أسطر فاضية.
+    """
+    blocks: List[str] = []
+    current: List[str] = []
+    in_code = False
+    for line in text.split("\n"):
+        if line.strip().startswith("```"):
+            in_code = not in_code
+        if not in_code and not line.strip():
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            continue
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+def _split_words(line: str, limit: int) -> List[str]:
+    chunks: List[str] = []
+    while len(line) > limit:
+        cut = line.rfind(" ", 0, limit)
+        if cut <= limit // 2:
+            cut = limit
+        chunks.append(line[:cut].rstrip())
+        line = line[cut:].lstrip()
+    chunks.append(line)
+    return chunks
+
+
+def _split_block(block: str, limit: int) -> List[str]:
+    # بلوك أكبر من الصفحة → سطر سطر، والكود بيتقفل ويتفتح تاني في كل جزء
+    fence = _FENCE_OPEN.match(block)
+    lines = block.split("\n")
+    opener = closer = ""
+    if fence:
+        opener, closer = lines[0] + "\n", "\n```"
+        lines = lines[1:-1] if lines[-1].strip() == "```" else lines[1:]
+    room = limit - len(opener) - len(closer)
+
+    parts: List[str] = []
+    current = ""
+    for line in lines:
+        for piece in _split_words(line, room):
+            candidate = f"{current}\n{piece}" if current else piece
+            if len(candidate) > room and current:
+                parts.append(opener + current + closer)
+                candidate = piece
+            current = candidate
+    if current:
+        parts.append(opener + current + closer)
+    return parts
+
+
+def split_answer(text: str, limit: int = 4000, first_limit: int = 0) -> List[str]:
+    """
+    يقسم الرد لصفحات كل واحدة ≤ limit حرف على حدود الفقرات / العناوين / الكود.
+    first_limit: مساحة الصفحة الأولى لو أقل (عليها السؤال كمان).
+    """
+    pages: List[str] = []
+    current = ""
+
+    def page_limit() -> int:
+        return first_limit if first_limit and not pages else limit
+
+    for block in _blocks(text):
+        pieces = [block] if len(block) <= page_limit() else _split_block(block, min(limit, page_limit()))
+        for piece in pieces:
+            candidate = f"{current}\n\n{piece}" if current else piece
+            # عنوان جديد والصفحة الحالية مليانة أكتر من نصها → يبدأ صفحة جديدة
+            starts_section = piece.startswith("#") and len(current) > page_limit() // 2
+            if current and (len(candidate) > page_limit() or starts_section):
+                pages.append(current)
+                candidate = piece
+            current = candidate
+    if current or not pages:
+        pages.append(current)
+    return pages
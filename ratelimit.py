@@ -0,0 +1,196 @@
+import math
+import time
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# =========================
+# محرك الـ Rate Limit (Token Bucket + Sliding Window)
+# =========================
+# كل الحسابات على time.monotonic() عشان تغيير ساعة السيستم ما يأثرش على الكول داون.
+# الـ state لكل مفتاح dict بسيط (JSON-friendly) عشان يتخزن في أي backend.
+
+SCOPES = ("guild", "channel", "user")
+
+
+@dataclass(frozen=True)
+class TokenBucket:
+    """
+    capacity: أقصى عدد طلبات ورا بعض (burst)
+    refill_seconds: كل قد إيه بيرجع token واحد
+    """
+    capacity: int
+    refill_seconds: float
+
+    def apply(self, state: Optional[dict], now: float, commit: bool) -> Tuple[bool, float, dict]:
+        if state is None:
+            tokens, last = float(self.capacity), now
+        else:
+            tokens, last = state["tokens"], state["ts"]
+
+        tokens = min(float(self.capacity), tokens + (now - last) / self.refill_seconds)
+
+        if tokens >= 1.0:
+            if commit:
+                tokens -= 1.0
+            return True, 0.0, {"tokens": tokens, "ts": now}
+
+        retry_after = (1.0 - tokens) * self.refill_seconds
+        return False, retry_after, {"tokens": tokens, "ts": now}
+
+    @property
+    def idle_seconds(self) -> float:
+        # بعد المدة دي الـ bucket بيكون رجع مليان → نقدر نمسح الـ state
+        return self.capacity * self.refill_seconds
+
+
+@dataclass(frozen=True)
+class SlidingWindow:
+    """
+    max_hits: أقصى عدد طلبات جوه أي نافذة طولها window_seconds
+    """
+    max_hits: int
+    window_seconds: float
+
+    def apply(self, state: Optional[dict], now: float, commit: bool) -> Tuple[bool, float, dict]:
+        hits = [] if state is None else state["hits"]
+        cutoff = now - self.window_seconds
+        hits = [t for t in hits if t > cutoff]
+
+        if len(hits) < self.max_hits:
+            if commit:
+                hits.append(now)
+            return True, 0.0, {"hits": hits, "ts": now}
+
+        retry_after = hits[0] - cutoff
+        return False, retry_after, {"hits": hits, "ts": now}
+
+    @property
+    def idle_seconds(self) -> float:
+        return self.window_seconds
+
+
+Limit = TokenBucket | SlidingWindow
+# states الحالية (بنفس ترتيب الـ keys) → (النتيجة، الـ states الجديدة أو None = ما تتكتبش)
+StateUpdater = Callable[[List[Optional[dict]]], Tuple[float, Optional[List[dict]]]]
+
+
+class MemoryRateLimitStore:
+    """
+    تخزين محلي داخل البروسيس. update() ذرّي لكل الـ keys مع بعض بالنسبة لكل الـ threads.
+    """
+
+    def __init__(self, prune_every: int = 1000):
+        self._states: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._ops = 0
+        self._prune_every = prune_every
+
+    def update(self, keys: List[str], fn: StateUpdater) -> float:
+        with self._lock:
+            result, new_states = fn([self._states.get(key) for key in keys])
+            if new_states is not None:
+                self._states.update(zip(keys, new_states))
+            self._ops += 1
+            if self._ops % self._prune_every == 0:
+                self._prune()
+            return result
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        stale = [
+            k for k, st in self._states.items()
+            if now - st.get("ts", now) > st.get("idle", 0)
+        ]
+        for k in stale:
+            del self._states[k]
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+class RateLimiter:
+    """
+    limits: scope -> قائمة limits (scope = guild | channel | user)
+    role_overrides: role_id -> {scope: limits}
+        لو اليوزر معاه أكتر من رول → أول رول في الترتيب هو اللي بيتطبق.
+    """
+
+    def __init__(
+        self,
+        limits: Mapping[str, Sequence[Limit]],
+        role_overrides: Optional[Mapping[int, Mapping[str, Sequence[Limit]]]] = None,
+        store=None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limits = {scope: list(limits.get(scope, ())) for scope in SCOPES}
+        self.role_overrides = dict(role_overrides or {})
+        self.store = store if store is not None else MemoryRateLimitStore()
+        self.clock = clock
+
+    def _limits_for(self, scope: str, role_ids: Iterable[int]) -> List[Limit]:
+        role_ids = set(role_ids)
+        for role_id, scoped in self.role_overrides.items():
+            if role_id in role_ids and scope in scoped:
+                return list(scoped[scope])
+        return self.limits[scope]
+
+    def _plan(
+        self,
+        user_id: int,
+        channel_id: Optional[int],
+        guild_id: Optional[int],
+        role_ids: Iterable[int],
+    ) -> List[Tuple[str, Limit]]:
+        role_ids = list(role_ids)
+        ids = {"guild": guild_id, "channel": channel_id, "user": user_id}
+        plan = []
+        for scope in SCOPES:
+            if ids[scope] is None:
+                continue
+            for i, limit in enumerate(self._limits_for(scope, role_ids)):
+                plan.append((f"{scope}:{ids[scope]}:{type(limit).__name__}:{i}", limit))
+        return plan
+
+    def hit(
+        self,
+        user_id: int,
+        channel_id: Optional[int] = None,
+        guild_id: Optional[int] = None,
+        role_ids: Iterable[int] = (),
+    ) -> float:
+        """
+        يرجع 0 لو الطلب مسموح (وبيتخصم من كل الـ scopes)،
+        أو عدد الثواني اللي لازم اليوزر يستناها.
+        مفيش أي خصم لو أي scope رفض الطلب.
+        الفحص والخصم لكل الـ scopes عملية واحدة ذرّية في الـ store (lock / transaction / MULTI)
+        → shards بتخبط في نفس اللحظة ما تتداخلش، ورفض scope ما بيسيبش scope تاني متخصم.
+        """
+        now = self.clock()
+        plan = self._plan(user_id, channel_id, guild_id, role_ids)
+        if not plan:
+            return 0.0
+
+        def fn(states: List[Optional[dict]]) -> Tuple[float, Optional[List[dict]]]:
+            # 1) فحص من غير خصم
+            retry_after = 0.0
+            for (_, limit), state in zip(plan, states):
+                allowed, wait, _ = limit.apply(state, now, commit=False)
+                if not allowed:
+                    retry_after = max(retry_after, wait)
+            if retry_after > 0:
+                return retry_after, None
+
+            # 2) خصم من كل الـ scopes
+            new_states = []
+            for (_, limit), state in zip(plan, states):
+                _, _, new_state = limit.apply(state, now, commit=True)
+                new_state["idle"] = limit.idle_seconds
+                new_states.append(new_state)
+            return 0.0, new_states
+
+        return self.store.update([key for key, _ in plan], fn)
+
+
+def format_retry_after(seconds: float) -> int:
+    return max(1, math.ceil(seconds))
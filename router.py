@@ -0,0 +1,177 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Mapping, Tuple
+
+from intents import classify_intent, count_questions, wants_detail
+
+# =========================
+# Model Router (flash-lite / flash / pro)
+# =========================
+# كل طلب شات بياخد score من إشارات بسيطة:
+# الطول + النية + عمق المحادثة + كلمات زي السعر / الشكاوى + عدد الأسئلة.
+# score قليل → أرخص وأسرع موديل، score عالي → موديل أقوى.
+
+
+@dataclass(frozen=True)
+class Route:
+    name: str
+    model_name: str
+    max_score: float                     # أعلى score الـ route ده بيستقبله
+    generation_config: Mapping[str, object] = field(default_factory=dict)
+    # موديل بيفكر قبل ما يرد: توكنز التفكير بتتحسب من max_output_tokens
+    thinking: bool = False
+
+
+@dataclass(frozen=True)
+class RoutingDecision:
+    route: Route
+    score: float
+    intent: str
+    signals: Tuple[str, ...]
+
+    @property
+    def profile(self) -> str:
+        # لو اليوزر طلب تفاصيل صراحةً → الـ profile المفصّل (حد أعلى للتوكنز)
+        if self.intent == "detailed" or "detail" in self.signals:
+            return "detailed"
+        return self.intent
+
+
+def build_generation_config(
+    route: Route,
+    profiles: Mapping[str, Mapping[str, object]],
+    profile_name: str
+) -> Dict[str, object]:
+    """
+    إعدادات الـ route + إعدادات الـ profile بتاع النية.
+    max_output_tokens = الأقل بين الاتنين (الـ route سقف، الـ profile طول الرد المناسب).
+    في موديلات التفكير (route.thinking) سقف الـ profile ما بيتطبقش: التفكير بياكل من
+    نفس السقف فالرد كان بيطلع فاضي أو مقطوع (MAX_TOKENS) → سقف الـ route بس.
+    """
+    config = dict(route.generation_config)
+    profile = profiles.get(profile_name) or profiles.get("general", {})
+    for key, value in profile.items():
+        if key == "max_output_tokens":
+            if route.thinking:
+                continue
+            if "max_output_tokens" in config:
+                value = min(int(config[key]), int(value))
+        config[key] = value
+    return config
+
+
+class RouteStats:
+    def __init__(self, samples: int = 500):
+        self.requests = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self._recent: Deque[float] = deque(maxlen=samples)
+
+    def record(
+        self,
+        latency: float,
+        ok: bool,
+        prompt_tokens: int = 0,
+        output_tokens: int = 0
+    ) -> None:
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self.latency_total += latency
+        self.prompt_tokens += prompt_tokens
+        self.output_tokens += output_tokens
+        self._recent.append(latency)
+
+    def as_dict(self) -> dict:
+        ordered = sorted(self._recent)
+        p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] if ordered else 0.0
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_avg": self.latency_total / self.requests if self.requests else 0.0,
+            "latency_p95": p95,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+# وزن كل إشارة في الـ score
+INTENT_WEIGHTS = {
+    "complaint": 3.0,
+    "pricing": 1.5,
+    "ordering": 1.0,
+    "detailed": 2.0,
+    "general": 0.0,
+}
+
+
+class ModelRouter:
+    def __init__(self, routes: List[Route]):
+        # مترتبين من الأرخص للأقوى
+        self.routes = sorted(routes, key=lambda r: r.max_score)
+        self.by_name = {r.name: r for r in self.routes}
+        self._stats: Dict[str, RouteStats] = {r.name: RouteStats() for r in self.routes}
+
+    def score(self, text: str, history_len: int) -> Tuple[float, str, Tuple[str, ...]]:
+        intent = classify_intent(text)
+        signals: List[str] = []
+        score = INTENT_WEIGHTS.get(intent, 0.0)
+        if score:
+            signals.append(f"intent:{intent}")
+
+        words = len(text.split())
+        if words > 25:
+            score += min(3.0, (words - 25) / 40 + 1)
+            signals.append(f"long:{words}w")
+
+        questions = count_questions(text)
+        if questions > 1:
+            score += min(3.0, questions - 1)
+            signals.append(f"multi:{questions}q")
+
+        if intent != "detailed" and wants_detail(text):
+            score += 2.0
+            signals.append("detail")
+
+        if history_len >= 4:
+            score += 1.0
+            signals.append(f"history:{history_len}")
+
+        return score, intent, tuple(signals)
+
+    def choose(self, text: str, history_len: int = 0) -> RoutingDecision:
+        score, intent, signals = self.score(text, history_len)
+        for route in self.routes:
+            if score <= route.max_score:
+                return RoutingDecision(route, score, intent, signals)
+        return RoutingDecision(self.routes[-1], score, intent, signals)
+
+    def record(
+        self,
+        route_name: str,
+        latency: float,
+        ok: bool,
+        prompt_tokens: int = 0,
+        output_tokens: int = 0
+    ) -> None:
+        stats = self._stats.get(route_name)
+        if stats is not None:
+            stats.record(latency, ok, prompt_tokens, output_tokens)
+
+    def stats(self) -> Dict[str, dict]:
+        return {name: st.as_dict() for name, st in self._stats.items()}
+
+
+def usage_tokens(response) -> Tuple[int, int]:
+    """
+    (prompt_tokens, output_tokens) من usage_metadata بتاع Gemini لو موجودة.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return 0, 0
+    return (
+        int(getattr(usage, "prompt_token_count", 0) or 0),
+        int(getattr(usage, "candidates_token_count", 0) or 0),
+    )
@@ -0,0 +1,133 @@
+import asyncio
+import heapq
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, List, Mapping, Optional
+
+# =========================
+# Priority Scheduler لطلبات Gemini
+# =========================
+# - عدد محدود من الطلبات شغال في نفس الوقت (max_concurrency)
+# - اللي مستني بيتخدم حسب الـ class بتاعه (رقم أقل = أولوية أعلى)
+# - Aging: كل aging_seconds انتظار بتساوي درجة أولوية كاملة،
+#   فالـ class الأقل عمره ما يستنى أكتر من (فرق الأولوية × aging_seconds) ورا الأعلى منه.
+#
+# الترتيب = enqueued_at + priority * aging_seconds
+# ده مكافئ لـ (priority - waited / aging_seconds) بس ثابت، فينفع يتحط في heap.
+
+
+class ClassStats:
+    def __init__(self, samples: int = 500):
+        self.queued = 0          # مستنيين دلوقتي
+        self.active = 0          # شغالين دلوقتي
+        self.admitted = 0        # اتخدموا إجمالًا
+        self.cancelled = 0       # اتلغوا وهما مستنيين
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._recent: Deque[float] = deque(maxlen=samples)
+
+    def record_wait(self, waited: float) -> None:
+        self.admitted += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self._recent.append(waited)
+
+    def percentile(self, q: float) -> float:
+        if not self._recent:
+            return 0.0
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def as_dict(self) -> dict:
+        return {
+            "queued": self.queued,
+            "active": self.active,
+            "admitted": self.admitted,
+            "cancelled": self.cancelled,
+            "wait_avg": self.wait_total / self.admitted if self.admitted else 0.0,
+            "wait_p95": self.percentile(0.95),
+            "wait_max": self.wait_max,
+        }
+
+
+class PriorityScheduler:
+    def __init__(
+        self,
+        classes: Mapping[str, int],
+        max_concurrency: int,
+        aging_seconds: float = 10.0,
+    ):
+        self.classes = dict(classes)
+        self.max_concurrency = max_concurrency
+        self.aging_seconds = aging_seconds
+        self._active = 0
+        self._heap: List[list] = []
+        self._seq = itertools.count()
+        self._stats: Dict[str, ClassStats] = {name: ClassStats() for name in self.classes}
+
+    def _class_of(self, name: Optional[str]) -> str:
+        if name in self.classes:
+            return name
+        # أي class مش معروف بياخد أقل أولوية
+        return max(self.classes, key=self.classes.get)
+
+    async def acquire(self, class_name: Optional[str] = None) -> str:
+        name = self._class_of(class_name)
+        stats = self._stats[name]
+        loop = asyncio.get_running_loop()
+
+        while self._heap and self._heap[0][2].done():
+            heapq.heappop(self._heap)
+
+        if self._active < self.max_concurrency and not self._heap:
+            self._active += 1
+            stats.active += 1
+            stats.record_wait(0.0)
+            return name
+
+        enqueued_at = loop.time()
+        fut = loop.create_future()
+        key = enqueued_at + self.classes[name] * self.aging_seconds
+        heapq.heappush(self._heap, [key, next(self._seq), fut])
+        stats.queued += 1
+
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # خد الدور واتلغى في نفس اللحظة → نسلّم الدور للي بعده
+                self._release_slot()
+            else:
+                stats.cancelled += 1
+            raise
+        finally:
+            stats.queued -= 1
+
+        stats.active += 1
+        stats.record_wait(loop.time() - enqueued_at)
+        return name
+
+    def _release_slot(self) -> None:
+        while self._heap:
+            _, _, fut = heapq.heappop(self._heap)
+            if not fut.done():
+                # الدور بيتنقل مباشرة من غير ما _active يقل
+                fut.set_result(None)
+                return
+        self._active -= 1
+
+    def release(self, class_name: str) -> None:
+        self._stats[class_name].active -= 1
+        self._release_slot()
+
+    @asynccontextmanager
+    async def slot(self, class_name: Optional[str] = None):
+        name = await self.acquire(class_name)
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    def stats(self) -> Dict[str, dict]:
+        return {name: st.as_dict() for name, st in self._stats.items()}
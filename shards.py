@@ -0,0 +1,136 @@
+"""
+تشغيل البوت على أكتر من process (كل process شايلة جزء من الـ shards).
+
+الاستخدام:
+    python shards.py --shards auto --processes 4
+    python shards.py --shards 8 --processes 2
+
+كل process بتشغّل bot.py بـ SHARD_COUNT و SHARD_IDS، ولو واحدة وقعت بتتشغل تاني لوحدها.
+لازم STATE_BACKEND مشترك (sqlite:///... أو redis://...) عشان الكول داون والتاريخ والإعدادات
+يبقوا واحد بين الـ processes.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+RESTART_DELAY = 5.0
+MAX_RESTART_DELAY = 120.0
+# METRICS_PORT لكل process: base + 100 * رقمها (والـ AI workers بتاعتها بعدها بـ 1 + index)
+METRICS_PORT_STRIDE = 100
+
+
+def recommended_shards(token: str) -> int:
+    request = urllib.request.Request(
+        GATEWAY_URL,
+        headers={"Authorization": f"Bot {token}", "User-Agent": "GP Team Assistant (shards.py)"}
+    )
+    with urllib.request.urlopen(request, timeout=15) as resp:
+        return int(json.load(resp)["shards"])
+
+
+def split_shards(shard_count: int, processes: int) -> List[List[int]]:
+    # shards متتالية لكل process: 10 على 3 → [0-3] [4-6] [7-9]
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    groups, start = [], 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        groups.append(list(range(start, end)))
+        start = end
+    return groups
+
+
+def spawn(shard_ids: List[int], shard_count: int, process_index: int = 0) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        SHARD_COUNT=str(shard_count),
+        SHARD_IDS=",".join(str(i) for i in shard_ids),
+        PYTHONUNBUFFERED="1",
+    )
+    metrics_base = int(os.getenv("METRICS_PORT", "0") or 0)
+    if metrics_base:
+        env["METRICS_PORT"] = str(metrics_base + METRICS_PORT_STRIDE * process_index)
+    return subprocess.Popen([sys.executable, "bot.py"], env=env)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run GP Team Assistant as several shard processes")
+    parser.add_argument("--shards", default="auto", help="عدد الـ shards الكلي أو auto (من Discord)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    load_dotenv()
+    token = os.getenv("DISCORD_TOKEN")
+    if token is None:
+        raise ValueError("⚠️ متغير DISCORD_TOKEN غير موجود في ملف .env")
+
+    backend = os.getenv("STATE_BACKEND", "").strip()
+    if args.processes > 1 and backend in ("", "memory"):
+        raise ValueError(
+            "⚠️ أكتر من process محتاج STATE_BACKEND مشترك (sqlite:///state.db أو redis://...)"
+        )
+
+    shard_count = recommended_shards(token) if args.shards == "auto" else int(args.shards)
+    groups = split_shards(shard_count, args.processes)
+    print(f"[SHARDS] {shard_count} shards on {len(groups)} processes • state: {backend or 'memory'}")
+
+    procs: Dict[int, subprocess.Popen] = {}
+    streaks: Dict[int, int] = {}
+    started: Dict[int, float] = {}
+    restart_at: Dict[int, float] = {}
+    for i, group in enumerate(groups):
+        procs[i] = spawn(group, shard_count, i)
+        started[i] = time.monotonic()
+        print(f"[SHARDS] process {i}: shards {group} (pid {procs[i].pid})")
+
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    while not stopping:
+        time.sleep(1)
+        now = time.monotonic()
+        for i, proc in procs.items():
+            if i in restart_at:
+                if now >= restart_at[i]:
+                    del restart_at[i]
+                    procs[i] = spawn(groups[i], shard_count, i)
+                    started[i] = now
+                    print(f"[SHARDS] process {i} restarted (pid {procs[i].pid})")
+                continue
+            code = proc.poll()
+            if code is None:
+                continue
+            # وقعت بعد ما اشتغلت شوية → مش crash loop
+            streaks[i] = 1 if now - started[i] > 300 else streaks.get(i, 0) + 1
+            delay = min(RESTART_DELAY * 2 ** (streaks[i] - 1), MAX_RESTART_DELAY)
+            restart_at[i] = now + delay
+            print(f"[SHARDS] process {i} (shards {groups[i]}) exited with code {code}, restarting in {delay:.0f}s")
+
+    print("[SHARDS] stopping ...")
+    for proc in procs.values():
+        if proc.poll() is None:
+            proc.terminate()
+    for proc in procs.values():
+        try:
+            proc.wait(30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+if __name__ == "__main__":
+    main()
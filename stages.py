@@ -0,0 +1,220 @@
+import asyncio
+import importlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+# =========================
+# Stages: شغل CPU محلي (regex / classifier / JSON) في process pool
+# =========================
+# الشغل ده لو اتعمل على الـ event loop بيأخر الـ gateway مع آلاف الرسائل في الدقيقة.
+# - كل stage = دالة top-level بتاخد item واحد (بتتحدد بـ "module:function" عشان تتعمل import في الـ child)
+# - الطلبات بتتجمع لكل stage لحد max_batch أو max_delay وتتبعت batch واحدة → IPC أقل
+# - STAGE_PROCESSES=0 (الافتراضي): بتشتغل inline زي الأول من غير process pool
+# - لو الـ pool وقع (BrokenProcessPool) بيتعمل تاني والـ batch دي بتتنفذ inline
+
+STAGES: Dict[str, str] = {
+    "postprocess": "postprocess:postprocess_traced",
+    "parse_moderation": "core:parse_moderation_result",
+    "offtopic": "core:is_off_topic",
+}
+
+_resolved: Dict[str, Callable[[Any], Any]] = {}
+
+
+class StageError(RuntimeError):
+    pass
+
+
+def _resolve(target: str) -> Callable[[Any], Any]:
+    fn = _resolved.get(target)
+    if fn is None:
+        module, _, name = target.partition(":")
+        fn = _resolved[target] = getattr(importlib.import_module(module), name)
+    return fn
+
+
+def _run_batch(target: str, items: List[Any]) -> List[Tuple[bool, Any]]:
+    # بيشتغل في الـ child process — غلطة في item واحد ما توقعش الباقي
+    fn = _resolve(target)
+    results = []
+    for item in items:
+        try:
+            results.append((True, fn(item)))
+        except Exception as e:
+            results.append((False, f"{type(e).__name__}: {e}"))
+    return results
+
+
+@dataclass
+class StageStats:
+    items: int = 0
+    batches: int = 0
+    errors: int = 0
+    inline: int = 0          # items اتنفذت على الـ event loop (من غير pool / بعد ما الـ pool وقع)
+    max_latency: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "batches": self.batches,
+            "avg_batch": self.items / self.batches if self.batches else 0.0,
+            "errors": self.errors,
+            "inline": self.inline,
+            "max_latency": self.max_latency,
+        }
+
+
+class StagePool:
+    def __init__(
+        self,
+        processes: int,
+        max_batch: int = 64,
+        max_delay: float = 0.005,
+        stages: Optional[Mapping[str, str]] = None,
+    ):
+        self.processes = processes
+        self.max_batch = max_batch
+        self.max_delay = max_delay       # أقصى وقت item يستنى الـ batch تتملى
+        self.stages = dict(stages if stages is not None else STAGES)
+        self.stats: Dict[str, StageStats] = {name: StageStats() for name in self.stages}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, List[Tuple[Any, asyncio.Future, float]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self.restarts = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # forkserver: الـ children ما بيورثوش threads / sockets الـ gateway
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=context)
+        return self._pool
+
+    # ---------- API ----------
+
+    async def run(self, stage: str, item: Any) -> Any:
+        """
+        ينفذ stage على item واحد (بيتجمع مع غيره في batch). بيرمي StageError لو الدالة رمت.
+        """
+        target = self.stages[stage]
+        if self.processes <= 0:
+            return self._run_inline(stage, target, item)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(stage, [])
+        pending.append((item, future, time.monotonic()))
+        if len(pending) >= self.max_batch:
+            self._flush(stage)
+        elif stage not in self._timers:
+            self._timers[stage] = loop.call_later(self.max_delay, self._flush, stage)
+        return await future
+
+    async def map(self, stage: str, items: List[Any]) -> List[Any]:
+        return list(await asyncio.gather(*(self.run(stage, item) for item in items)))
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ---------- internal ----------
+
+    def _run_inline(self, stage: str, target: str, item: Any) -> Any:
+        stats = self.stats[stage]
+        stats.items += 1
+        stats.inline += 1
+        ok, value = _run_batch(target, [item])[0]
+        if not ok:
+            stats.errors += 1
+            raise StageError(f"{stage}: {value}")
+        return value
+
+    def _flush(self, stage: str) -> None:
+        timer = self._timers.pop(stage, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(stage, [])
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+
+        stats = self.stats[stage]
+        stats.items += len(batch)
+        stats.batches += 1
+        target = self.stages[stage]
+        items = [item for item, _, _ in batch]
+        pool = self._executor()
+        try:
+            submitted = pool.submit(_run_batch, target, items)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._restart(pool, e)
+            self._deliver(stage, batch, _run_batch(target, items), inline=True)
+            return
+
+        def _done(fut: "asyncio.Future") -> None:
+            try:
+                results = fut.result()
+            except BrokenProcessPool as e:
+                # process وقعت في النص → نعيد الـ pool وننفذ الـ batch دي هنا
+                self._restart(pool, e)
+                results = _run_batch(target, items)
+                self._deliver(stage, batch, results, inline=True)
+                return
+            except Exception as e:
+                results = [(False, f"{type(e).__name__}: {e}")] * len(items)
+            self._deliver(stage, batch, results)
+
+        asyncio.wrap_future(submitted).add_done_callback(_done)
+
+    def _deliver(
+        self,
+        stage: str,
+        batch: List[Tuple[Any, asyncio.Future, float]],
+        results: List[Tuple[bool, Any]],
+        inline: bool = False,
+    ) -> None:
+        stats = self.stats[stage]
+        if inline:
+            stats.inline += len(batch)
+        now = time.monotonic()
+        for (_, future, queued_at), (ok, value) in zip(batch, results):
+            stats.max_latency = max(stats.max_latency, now - queued_at)
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                stats.errors += 1
+                future.set_exception(StageError(f"{stage}: {value}"))
+
+    def _restart(self, pool: ProcessPoolExecutor, error: Exception) -> None:
+        # أكتر من batch ممكن تلاقي نفس الـ pool واقع → نعيده مرة واحدة بس
+        if self._pool is not pool:
+            return
+        print(f"[STAGES] process pool broken ({error}), restarting")
+        self.restarts += 1
+        self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+_stage_pool: Optional[StagePool] = None
+
+
+def stage_pool() -> StagePool:
+    """
+    الـ pool المشترك (STAGE_PROCESSES في .env، 0 = inline). الـ processes بتتعمل مع أول batch.
+    """
+    global _stage_pool
+    if _stage_pool is None:
+        _stage_pool = StagePool(max(0, int(os.getenv("STAGE_PROCESSES", "0") or 0)))
+    return _stage_pool
+
+
+async def run_stage(stage: str, item: Any) -> Any:
+    return await stage_pool().run(stage, item)
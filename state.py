@@ -0,0 +1,349 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from ratelimit import MemoryRateLimitStore, StateUpdater
+
+# =========================
+# Shared State: تاريخ المحادثات + الـ Rate Limits + الإعدادات
+# =========================
+# نفس الـ API لكل الـ backends:
+# - get_history / append_history / clear_history: تاريخ كل محادثة (key = "قناة:يوزر")
+# - update(keys, fn): الـ store بتاع RateLimiter — الفحص والخصم لكل الـ keys عملية واحدة ذرّية
+#   حتى بين الـ processes
+# - load_config / update_config: القناة ورولات الاستثناء (بدل config.json لوحده)
+# - modify_config(key, fn): read-modify-write ذرّي لمفتاح واحد (رولات استثناء سيرفر مثلًا)
+#   عشان processes مختلفة بتعدّل في نفس الوقت ما تمسحش تعديلات بعض
+# - clock: الساعة اللي الـ RateLimiter يستخدمها مع الـ backend ده
+#
+# STATE_BACKEND في .env:
+#   memory (الافتراضي)            → في الـ process نفسها + config.json (زي الأول)
+#   sqlite:///state.db             → ملف واحد لكل الـ processes على نفس الجهاز
+#   redis://localhost:6379/0       → أي سيرفر Redis-compatible (محتاج pip install redis)
+#
+# الـ backends المشتركة بتستخدم time.time() مش monotonic: الساعة لازم تبقى واحدة بين الـ processes.
+# shared = True: كل عملية ممكن تستنى lock (SQLite) أو network (Redis) → البوت بينفذها برّه
+# الـ event loop (core.run_state).
+
+DEFAULT_CONFIG_FILE = "config.json"
+
+
+def history_key(channel_id: int, user_id: int) -> str:
+    return f"{channel_id}:{user_id}"
+
+
+def _read_config_file(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+class MemoryState:
+    shared = False
+
+    def __init__(self, config_file: str = DEFAULT_CONFIG_FILE):
+        self.config_file = config_file
+        self.clock: Callable[[], float] = time.monotonic
+        self._history: Dict[str, List[dict]] = {}
+        self._rate_limits = MemoryRateLimitStore()
+        # process واحدة هي اللي بتكتب الملف → بيتقري مرة واحدة وبعدين من الذاكرة
+        self._config: Optional[dict] = None
+        self._config_lock = threading.Lock()
+
+    # ---------- history ----------
+
+    def get_history(self, key: str) -> List[dict]:
+        return list(self._history.get(key, ()))
+
+    def append_history(self, key: str, entries: List[dict], keep: int) -> None:
+        history = self._history.setdefault(key, [])
+        history.extend(entries)
+        if len(history) > keep:
+            self._history[key] = history[-keep:]
+
+    def clear_history(self, key: str) -> None:
+        self._history.pop(key, None)
+
+    # ---------- rate limits ----------
+
+    def update(self, keys: List[str], fn: StateUpdater) -> float:
+        return self._rate_limits.update(keys, fn)
+
+    # ---------- config ----------
+
+    def _loaded_config(self) -> dict:
+        # والـ lock ماسك
+        if self._config is None:
+            self._config = _read_config_file(self.config_file)
+        return self._config
+
+    def _write_config(self, data: dict) -> None:
+        with open(self.config_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        self._config = data
+
+    def load_config(self) -> dict:
+        with self._config_lock:
+            return dict(self._loaded_config())
+
+    def update_config(self, values: dict) -> None:
+        # بنعدّل المفاتيح المطلوبة بس (القناة + رولات الاستثناء في نفس الملف)
+        with self._config_lock:
+            data = dict(self._loaded_config())
+            data.update(values)
+            self._write_config(data)
+
+    def modify_config(self, key: str, fn: Callable[[Any], Any]) -> Any:
+        with self._config_lock:
+            data = dict(self._loaded_config())
+            data[key] = fn(data.get(key))
+            self._write_config(data)
+            return data[key]
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "histories": len(self._history), "rate_limit_keys": len(self._rate_limits)}
+
+
+class SQLiteState:
+    """
+    ملف SQLite واحد (WAL) مشترك بين كل الـ processes على الجهاز.
+    كل عملية read-modify-write جوه BEGIN IMMEDIATE → ذرّية بين الـ processes.
+    """
+    shared = True
+
+    def __init__(
+        self,
+        path: str,
+        history_ttl: Optional[float] = None,
+        seed_config_file: Optional[str] = DEFAULT_CONFIG_FILE,
+        prune_every: int = 1000,
+    ):
+        self.path = path
+        self.history_ttl = history_ttl
+        self.clock: Callable[[], float] = time.time
+        self._lock = threading.Lock()
+        self._ops = 0
+        self._prune_every = prune_every
+        self._db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            " ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL,"
+            " PRIMARY KEY (ns, key))"
+        )
+        if seed_config_file and not self.load_config():
+            # أول تشغيل بعد التحويل من memory → ننقل config.json
+            seed = _read_config_file(seed_config_file)
+            if seed:
+                self.update_config(seed)
+
+    def _get(self, ns: str, key: str) -> Optional[Any]:
+        row = self._db.execute(
+            "SELECT value, expires_at FROM kv WHERE ns = ? AND key = ?", (ns, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return json.loads(row[0])
+
+    def _put(self, ns: str, key: str, value: Any, ttl: Optional[float]) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        self._db.execute(
+            "INSERT OR REPLACE INTO kv (ns, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (ns, key, json.dumps(value, ensure_ascii=False), expires_at)
+        )
+
+    def _transaction(self, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._ops += 1
+            if self._ops % self._prune_every == 0:
+                self._db.execute("DELETE FROM kv WHERE expires_at < ?", (time.time(),))
+            return result
+
+    # ---------- history ----------
+
+    def get_history(self, key: str) -> List[dict]:
+        with self._lock:
+            return self._get("history", key) or []
+
+    def append_history(self, key: str, entries: List[dict], keep: int) -> None:
+        def _append():
+            history = (self._get("history", key) or []) + entries
+            self._put("history", key, history[-keep:], self.history_ttl)
+
+        self._transaction(_append)
+
+    def clear_history(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM kv WHERE ns = 'history' AND key = ?", (key,))
+
+    # ---------- rate limits ----------
+
+    def update(self, keys: List[str], fn: StateUpdater) -> float:
+        def _update():
+            result, new_states = fn([self._get("ratelimit", key) for key in keys])
+            for key, new_state in zip(keys, new_states or ()):
+                self._put("ratelimit", key, new_state, new_state.get("idle"))
+            return result
+
+        return self._transaction(_update)
+
+    # ---------- config ----------
+
+    def load_config(self) -> dict:
+        with self._lock:
+            rows = self._db.execute("SELECT key, value FROM kv WHERE ns = 'config'").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def update_config(self, values: dict) -> None:
+        def _update():
+            for key, value in values.items():
+                self._put("config", key, value, None)
+
+        self._transaction(_update)
+
+    def modify_config(self, key: str, fn: Callable[[Any], Any]) -> Any:
+        def _modify():
+            value = fn(self._get("config", key))
+            self._put("config", key, value, None)
+            return value
+
+        return self._transaction(_modify)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT ns, COUNT(*) FROM kv GROUP BY ns").fetchall())
+        return {
+            "backend": f"sqlite ({self.path})",
+            "histories": counts.get("history", 0),
+            "rate_limit_keys": counts.get("ratelimit", 0),
+        }
+
+
+class RedisState:
+    """
+    أي سيرفر Redis-compatible. الـ rate limit بـ WATCH/MULTI (optimistic) على كل مفاتيح الطلب
+    مع بعض → ذرّي بين كل الـ shards.
+    """
+    shared = True
+
+    def __init__(
+        self,
+        url: str,
+        prefix: str = "gp:",
+        history_ttl: Optional[float] = None,
+        seed_config_file: Optional[str] = DEFAULT_CONFIG_FILE,
+    ):
+        try:
+            import redis  # optional
+        except ImportError as e:
+            raise ValueError("⚠️ STATE_BACKEND=redis محتاج: pip install redis") from e
+        self._watch_error = redis.WatchError
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self.url = url
+        self.prefix = prefix
+        self.history_ttl = history_ttl
+        self.clock: Callable[[], float] = time.time
+        if seed_config_file and not self.load_config():
+            seed = _read_config_file(seed_config_file)
+            if seed:
+                self.update_config(seed)
+
+    # ---------- history ----------
+
+    def get_history(self, key: str) -> List[dict]:
+        return [json.loads(item) for item in self._redis.lrange(f"{self.prefix}history:{key}", 0, -1)]
+
+    def append_history(self, key: str, entries: List[dict], keep: int) -> None:
+        name = f"{self.prefix}history:{key}"
+        pipe = self._redis.pipeline()
+        pipe.rpush(name, *(json.dumps(e, ensure_ascii=False) for e in entries))
+        pipe.ltrim(name, -keep, -1)
+        if self.history_ttl:
+            pipe.expire(name, int(self.history_ttl))
+        pipe.execute()
+
+    def clear_history(self, key: str) -> None:
+        self._redis.delete(f"{self.prefix}history:{key}")
+
+    # ---------- rate limits ----------
+
+    def update(self, keys: List[str], fn: StateUpdater) -> float:
+        names = [f"{self.prefix}ratelimit:{key}" for key in keys]
+        with self._redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*names)
+                    raws = pipe.mget(names)
+                    result, new_states = fn([json.loads(raw) if raw else None for raw in raws])
+                    if new_states is None:
+                        pipe.unwatch()
+                        return result
+                    pipe.multi()
+                    for name, new_state in zip(names, new_states):
+                        ttl_ms = max(1, int(new_state.get("idle", 0) * 1000)) if new_state.get("idle") else None
+                        pipe.set(name, json.dumps(new_state), px=ttl_ms)
+                    pipe.execute()
+                    return result
+                except self._watch_error:
+                    # shard تاني عدّل نفس المفتاح في نفس اللحظة → نعيد بالقيمة الجديدة
+                    continue
+
+    # ---------- config ----------
+
+    def load_config(self) -> dict:
+        return {key: json.loads(value) for key, value in self._redis.hgetall(f"{self.prefix}config").items()}
+
+    def update_config(self, values: dict) -> None:
+        if values:
+            self._redis.hset(
+                f"{self.prefix}config",
+                mapping={key: json.dumps(value, ensure_ascii=False) for key, value in values.items()}
+            )
+
+    def modify_config(self, key: str, fn: Callable[[Any], Any]) -> Any:
+        name = f"{self.prefix}config"
+        with self._redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(name)
+                    raw = pipe.hget(name, key)
+                    value = fn(json.loads(raw) if raw else None)
+                    pipe.multi()
+                    pipe.hset(name, key, json.dumps(value, ensure_ascii=False))
+                    pipe.execute()
+                    return value
+                except self._watch_error:
+                    continue
+
+    def stats(self) -> dict:
+        return {"backend": f"redis ({self.url})"}
+
+
+def open_state(url: Optional[str] = None, config_file: str = DEFAULT_CONFIG_FILE):
+    """
+    url: memory | sqlite:///path.db | redis://host:port/db (الافتراضي من STATE_BACKEND)
+    """
+    url = (url if url is not None else os.getenv("STATE_BACKEND", "")).strip()
+    if not url or url == "memory":
+        return MemoryState(config_file)
+    if url.startswith("sqlite:///"):
+        # sqlite:///state.db (نسبي) أو sqlite:////var/lib/gp/state.db (مطلق)
+        return SQLiteState(url[len("sqlite:///"):] or "state.db", seed_config_file=config_file)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisState(url, seed_config_file=config_file)
+    raise ValueError(f"⚠️ STATE_BACKEND غير معروف: {url}")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# الموديولات flat في جذر الريبو
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,51 @@
+import pytest
+
+from answer_cache import AnswerCache, canonical_key, same_question
+
+
+def cache_with(question: str) -> AnswerCache:
+    cache = AnswerCache(version="v1")
+    cache.put(question, "cached answer")
+    return cache
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("who is the founder", "where is the founder"),
+    ("what is apkg", "where is apkg"),
+    ("who founded gp team", "when was gp team founded"),
+    ("is gp team hiring", "is gp team not hiring"),
+    ("is gp team not hiring", "is gp team hiring"),
+    ("هل الاستضافة مجانية", "هل الاستضافة غير مجانية"),
+    ("is gp team hiring", "is gp team firing"),
+])
+def test_different_questions_do_not_share_answers(stored, asked):
+    assert cache_with(stored).get(asked) is None
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("how do i order a bot?", "How can I order a bot"),
+    ("كيف أطلب بوت؟", "كيف اطلب بوت"),
+    ("ابي اطلب بوت", "اريد اطلب بوت"),
+    ("how to order bots", "how to order bot"),
+    ("what are the prices", "what are the price"),
+])
+def test_rephrased_questions_hit(stored, asked):
+    assert cache_with(stored).get(asked) == "cached answer"
+
+
+def test_key_keeps_interrogatives_negations_and_order():
+    assert canonical_key("Who founded GP Team?") == "who founded gp team"
+    assert canonical_key("is gp team not hiring") == "gp team not hiring"
+    assert canonical_key("team gp") != canonical_key("gp team")
+
+
+def test_same_question_requires_every_word():
+    assert same_question("order bot", "order bot")
+    assert not same_question("order bot", "order bot discord")
+    assert not same_question("who founder", "where founder")
+
+
+def test_new_version_invalidates_entries():
+    cache = cache_with("how do i order a bot")
+    cache.version = "v2"
+    assert cache.get("how do i order a bot") is None
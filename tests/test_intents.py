@@ -0,0 +1,18 @@
+from intents import detect_smalltalk
+
+
+def test_plain_greetings_and_thanks_are_smalltalk():
+    assert detect_smalltalk("hi") == "greeting"
+    assert detect_smalltalk("شكرا") == "thanks"
+    assert detect_smalltalk("👍🔥") == "emoji"
+
+
+def test_mentions_and_links_are_never_smalltalk():
+    assert detect_smalltalk("hi @everyone") is None
+    assert detect_smalltalk("thanks <@123>") is None
+    assert detect_smalltalk("hi discord.gg/abc") is None
+    assert detect_smalltalk("hello https://example.com") is None
+
+
+def test_questions_are_not_smalltalk():
+    assert detect_smalltalk("hi how do I join the team?") is None
@@ -0,0 +1,43 @@
+from knowledge import DEFAULT_EXCLUDE_TAGS, SOURCE_FILE, build_language_packs, compile_knowledge
+
+SOURCE = """## Channels
+- About GP Team (EN): <#1437418112365363423>
+- About GP Team (AR): <#1439330303968678102>
+- Rules (EN): https://discord.com/channels/1/1437473469943251138
+- القوانين (AR): https://discord.com/channels/1/1439330816306970795
+
+## Greetings
+- Arabic: "أهلًا بيك في GP Team"
+- English: "Welcome to GP Team"
+- "مرحبا بيك"
+- "Hello there"
+"""
+
+
+def test_channel_and_link_facts_stay_in_both_packs():
+    packs = build_language_packs(SOURCE)
+    for lang in ("ar", "en"):
+        assert "<#1437418112365363423>" in packs[lang]
+        assert "<#1439330303968678102>" in packs[lang]
+        assert "1437473469943251138" in packs[lang]
+        assert "1439330816306970795" in packs[lang]
+
+
+def test_examples_only_in_their_own_language():
+    packs = build_language_packs(SOURCE)
+    assert "أهلًا بيك" in packs["ar"] and "Welcome to GP Team" not in packs["ar"]
+    assert "Welcome to GP Team" in packs["en"] and "أهلًا بيك" not in packs["en"]
+    assert "مرحبا بيك" not in packs["en"] and "Hello there" not in packs["ar"]
+    assert packs["mixed"] == SOURCE
+
+
+def test_only_mechanical_format_rules_leave_the_prompt():
+    with open(SOURCE_FILE, encoding="utf-8") as f:
+        prompt = compile_knowledge(f.read(), DEFAULT_EXCLUDE_TAGS)["packs"]["mixed"]
+    # أسلوب الرد واللغة والأسئلة برّه GP Team لازم يوصلوا للموديل
+    assert "ALWAYS reply in the SAME language the user used." in prompt
+    assert "WHAT TO DO IF USER ASKS OUTSIDE GP TEAM" in prompt
+    assert "BE CONFIDENT" in prompt
+    # اللي postprocess.py بيطبقه بس هو اللي بيتشال
+    assert "Max 4000 characters per description." not in prompt
+    assert "Dont Type Rule Number" not in prompt
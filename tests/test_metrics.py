@@ -0,0 +1,30 @@
+import asyncio
+
+from metrics import STAGE_SECONDS, stage_timer
+
+
+def _count(stage: str, outcome: str) -> str:
+    prefix = f'gp_stage_seconds_count{{stage="{stage}",model="",outcome="{outcome}"}}'
+    return next((line for line in STAGE_SECONDS.render() if line.startswith(prefix)), "")
+
+
+def test_cancelled_stage_is_not_an_error():
+    async def reply():
+        with stage_timer("test_cancel"):
+            await asyncio.sleep(10)
+
+    async def main():
+        task = asyncio.create_task(reply())
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    assert _count("test_cancel", "cancelled").endswith(" 1.0")
+    assert _count("test_cancel", "error") == ""
+
+
+def test_outcome_set_inside_the_stage_is_recorded():
+    with stage_timer("test_outcome") as timer:
+        timer.outcome = "error"
+    assert _count("test_outcome", "error").endswith(" 1.0")
@@ -0,0 +1,75 @@
+import re
+
+import pytest
+
+from postprocess import postprocess_answer, split_answer, strip_rule_numbers, unwrap_links
+
+LINK_IN_CODE = re.compile(r"`[^`]*(?:https?://|discord\.gg/|<#\d+>)[^`]*`")
+RULE_NUMBER = re.compile(r"\b(?:rule|section)\s*#?\d+|القاعد[ةه]\s*(?:رقم\s*)?\d+", re.I)
+
+
+@pytest.mark.parametrize("answer", [
+    "Join here: `https://discord.gg/gpteam`",
+    "Rules:\n```\nhttps://discord.com/channels/1/2\n<#1437473469943251138>\n```",
+    "- About GP Team: `<#1437418112365363423>`",
+    "According to rule 18, you can't advertise here.",
+    "You can't advertise (Rule 18).",
+    "Advertising is not allowed, rule 18.",
+    "Spam is banned. See rule 7. Thanks!",
+    "حسب القاعدة رقم 18، ممنوع الإعلان.",
+    "ممنوع الإعلان (القاعدة 5).",
+])
+def test_output_is_compliant(answer):
+    out = postprocess_answer(answer)
+    assert not LINK_IN_CODE.search(out)
+    assert not RULE_NUMBER.search(out)
+    assert out.strip()
+
+
+def test_rule_reference_sentences_read_naturally():
+    assert postprocess_answer("According to rule 18, you can't advertise.") == "You can't advertise."
+    assert postprocess_answer("Spam is banned. See rule 7.") == "Spam is banned."
+    assert postprocess_answer("See rule 7. Then ask again.") == "Then ask again."
+    assert postprocess_answer("No ads, rule 18.") == "No ads."
+
+
+def test_rule_labels_keep_the_rule_text():
+    assert postprocess_answer("Rule 1: No spam.\nRule 2: Be respectful.") == "No spam.\nBe respectful."
+    assert postprocess_answer("القاعدة 5: ممنوع السبام.") == "ممنوع السبام."
+    assert postprocess_answer("- Rule 3: No ads.\n- Discord rule 2: be nice.") == "- No ads.\n- Discord rule 2: be nice."
+
+
+@pytest.mark.parametrize("text", [
+    "Use the command `/rules 2` to see them.",
+    "You have 2 rules 5 minutes apart",
+    "Discord ToS rule 3 forbids that.",
+    "This breaks Discord ToS rule 3.",
+    "Please check rule 4 and 5 first",
+    "Read section 3 of the guide for setup.",
+    "Check rule 5 before posting anything.",
+    "The price is 5$ per rule 3.",
+    "Advertising is not allowed, see Rule 18.",
+    "See rule 7 for the details.",
+])
+def test_normal_text_is_not_touched(text):
+    assert strip_rule_numbers(text) == text
+    assert postprocess_answer(text) == text
+
+
+def test_code_is_never_rewritten():
+    code = "```bash\n# rule 5\ncurl https://example.com/install.sh | bash\n```"
+    assert postprocess_answer(code + "\nAs per rule 5, run it once.") == code + "\nRun it once."
+    assert unwrap_links("run `bash <(curl https://x.sh)`") == "run `bash <(curl https://x.sh)`"
+
+
+def test_markdown_is_embed_friendly():
+    out = postprocess_answer("# Title\n\n\n\ntext<br>more **bold")
+    assert out == "### Title\n\ntext\nmore bold"
+    assert postprocess_answer("```py\nprint(1)") == "```py\nprint(1)\n```"
+
+
+def test_split_answer_respects_limit():
+    text = "\n\n".join(f"### Part {i}\n" + "word " * 150 for i in range(10))
+    pages = split_answer(text, limit=1000)
+    assert len(pages) > 1
+    assert all(len(page) <= 1000 for page in pages)
@@ -0,0 +1,71 @@
+from ratelimit import RateLimiter, SlidingWindow, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_refills_one_token_per_period():
+    clock = FakeClock()
+    limiter = RateLimiter({"user": [TokenBucket(capacity=2, refill_seconds=10)]}, clock=clock)
+
+    assert limiter.hit(1) == 0
+    assert limiter.hit(1) == 0
+    assert limiter.hit(1) == 10
+
+    clock.now += 4
+    assert limiter.hit(1) == 6
+    clock.now += 6
+    assert limiter.hit(1) == 0
+    assert limiter.hit(1) == 10
+
+
+def test_sliding_window_expires_old_hits():
+    clock = FakeClock()
+    limiter = RateLimiter({"user": [SlidingWindow(max_hits=2, window_seconds=60)]}, clock=clock)
+
+    assert limiter.hit(1) == 0
+    clock.now += 20
+    assert limiter.hit(1) == 0
+    assert limiter.hit(1) == 40
+
+    clock.now += 40
+    assert limiter.hit(1) == 0
+    assert limiter.hit(1) == 20
+
+
+def test_denied_scope_charges_no_other_scope():
+    clock = FakeClock()
+    limiter = RateLimiter(
+        {
+            "channel": [SlidingWindow(max_hits=1, window_seconds=30)],
+            "user": [TokenBucket(capacity=1, refill_seconds=5)],
+        },
+        clock=clock,
+    )
+
+    assert limiter.hit(1, channel_id=10) == 0
+    # القناة رافضة → اليوزر التاني ما يتخصمش منه
+    assert limiter.hit(2, channel_id=10) == 30
+    assert limiter.hit(2, channel_id=11) == 0
+    # اليوزر الأول مسموح في القناة، بس الـ bucket بتاعه فاضي
+    assert limiter.hit(1, channel_id=12) == 5
+    clock.now += 5
+    assert limiter.hit(1, channel_id=12) == 0
+
+
+def test_role_override_replaces_scope_limits():
+    limiter = RateLimiter(
+        {"user": [TokenBucket(capacity=1, refill_seconds=60)]},
+        role_overrides={7: {"user": []}},
+        clock=FakeClock(),
+    )
+
+    assert limiter.hit(1) == 0
+    assert limiter.hit(1) == 60
+    assert limiter.hit(1, role_ids=[7]) == 0
+    assert limiter.hit(1, role_ids=[7]) == 0
@@ -0,0 +1,22 @@
+from router import ModelRouter, Route, build_generation_config
+
+PROFILES = {"general": {"max_output_tokens": 300, "temperature": 0.5}}
+
+
+def test_profile_caps_only_non_thinking_routes():
+    lite = Route("lite", "lite-model", 1.0, {"max_output_tokens": 1024})
+    flash = Route("flash", "flash-model", 4.0, {"max_output_tokens": 4096}, thinking=True)
+
+    assert build_generation_config(lite, PROFILES, "general") == {"max_output_tokens": 300, "temperature": 0.5}
+    assert build_generation_config(flash, PROFILES, "general") == {"max_output_tokens": 4096, "temperature": 0.5}
+
+
+def test_long_multi_question_messages_use_stronger_routes():
+    router = ModelRouter([
+        Route("pro", "pro-model", float("inf")),
+        Route("lite", "lite-model", 1.0),
+    ])
+
+    assert router.choose("hi").route.name == "lite"
+    long_text = " ".join(["why is this happening?"] * 20)
+    assert router.choose(long_text).route.name == "pro"
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+import core
+from scheduler import PriorityScheduler
+
+
+def test_chat_moves_during_a_moderation_storm():
+    release = threading.Event()
+
+    def slow_moderation():
+        release.wait(5)
+        return "safe"
+
+    async def moderate():
+        async with core.ai_scheduler("moderation").slot("default"):
+            return await core.run_model_call("moderation", slow_moderation)
+
+    async def chat():
+        async with core.ai_scheduler("chat").slot("default"):
+            return await core.run_model_call("chat", lambda: "answer")
+
+    async def main():
+        storm = [asyncio.create_task(moderate()) for _ in range(16)]
+        await asyncio.sleep(0.05)
+        try:
+            # كل threads الـ moderation مشغولة والباقي في الطابور، والشات لسه بيتخدم
+            assert await asyncio.wait_for(chat(), timeout=1) == "answer"
+            moderation = core.ai_scheduler("moderation")
+            assert sum(st["active"] for st in moderation.stats().values()) == moderation.max_concurrency
+        finally:
+            release.set()
+        assert await asyncio.gather(*storm) == ["safe"] * 16
+
+    asyncio.run(main())
+
+
+def test_slots_match_executor_threads():
+    for workload in core.AI_WORKLOADS:
+        assert core.ai_scheduler(workload).max_concurrency == core.executor(workload).max_workers
+
+
+def test_aging_lets_low_priority_requests_through():
+    scheduler = PriorityScheduler({"staff": 0, "background": 4}, max_concurrency=1, aging_seconds=0.01)
+    order = []
+
+    async def job(name):
+        async with scheduler.slot(name):
+            order.append(name)
+
+    async def main():
+        await scheduler.acquire("staff")
+        background = asyncio.create_task(job("background"))
+        await asyncio.sleep(0.06)
+        # background مستني أكتر من 4 × aging_seconds → بيتقدم على staff اللي لسه جاي
+        staff = asyncio.create_task(job("staff"))
+        await asyncio.sleep(0)
+        scheduler.release("staff")
+        await asyncio.gather(background, staff)
+
+    asyncio.run(main())
+    assert order == ["background", "staff"]
+
+
+def test_higher_priority_goes_first_without_aging():
+    scheduler = PriorityScheduler({"staff": 0, "background": 4}, max_concurrency=1, aging_seconds=10)
+    order = []
+
+    async def job(name):
+        async with scheduler.slot(name):
+            order.append(name)
+
+    async def main():
+        await scheduler.acquire("staff")
+        tasks = [asyncio.create_task(job("background")), asyncio.create_task(job("staff"))]
+        await asyncio.sleep(0)
+        scheduler.release("staff")
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order == ["staff", "background"]
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from state import MemoryState, SQLiteState
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backends(request, tmp_path):
+    # اتنين "shards" على نفس الإعدادات
+    if request.param == "memory":
+        state = MemoryState(str(tmp_path / "config.json"))
+        return state, state
+    path = str(tmp_path / "state.db")
+    return (
+        SQLiteState(path, seed_config_file=None),
+        SQLiteState(path, seed_config_file=None),
+    )
+
+
+def test_modify_config_keeps_concurrent_updates(backends):
+    def add(state, role_id):
+        state.modify_config("exempt_roles:1", lambda cur: sorted(set(cur or []) | {role_id}))
+
+    with ThreadPoolExecutor(8) as pool:
+        for role_id in range(40):
+            pool.submit(add, backends[role_id % 2], role_id)
+
+    assert backends[0].load_config()["exempt_roles:1"] == list(range(40))
+    assert backends[1].load_config()["exempt_roles:1"] == list(range(40))
+
+
+def test_modify_config_leaves_other_keys(backends):
+    first, second = backends
+    first.update_config({"channel": 5})
+    second.modify_config("exempt_roles:2", lambda cur: [7])
+    config = first.load_config()
+    assert config["channel"] == 5
+    assert config["exempt_roles:2"] == [7]
+
+
+def test_rate_limit_is_atomic_across_shards(backends):
+    from ratelimit import RateLimiter, SlidingWindow
+
+    limits = {
+        "channel": [SlidingWindow(max_hits=10, window_seconds=60)],
+        "user": [SlidingWindow(max_hits=1, window_seconds=60)],
+    }
+    limiters = [RateLimiter(limits, store=state, clock=state.clock) for state in backends]
+
+    # 20 يوزر مختلف على shards مختلفة في نفس القناة → 10 بس يعدّوا
+    with ThreadPoolExecutor(8) as pool:
+        waits = list(pool.map(lambda user: limiters[user % 2].hit(user, channel_id=1), range(20)))
+    assert sum(wait == 0 for wait in waits) == 10
+
+    # القناة رافضة → اليوزر ما اتخصمش منه ويقدر يستخدم قناة تانية
+    denied = [user for user, wait in enumerate(waits) if wait > 0]
+    assert limiters[0].hit(denied[0], channel_id=2) == 0
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from multiprocessing import Pipe
+
+import workers
+from workers import JOB_CANCEL, JOB_CHAT, JOB_STATS, WorkerCrashed, WorkerPool
+
+
+def test_cancel_message_stops_the_job_in_the_worker(monkeypatch):
+    finished = []
+
+    async def slow_job(core, kind, args):
+        await asyncio.sleep(0.5)
+        # لو وصلنا هنا الـ worker كان هيكتب السؤال والرد في التاريخ والكاش
+        finished.append(args)
+        return "answer"
+
+    monkeypatch.setattr(workers, "_run_job", slow_job)
+    gateway, worker_conn = Pipe()
+    thread = threading.Thread(
+        target=lambda: asyncio.run(workers._worker_loop(0, worker_conn, warmup=False)), daemon=True
+    )
+    thread.start()
+
+    gateway.send((1, JOB_CHAT, {"user_message": "old"}))
+    gateway.send((2, JOB_CHAT, {"user_message": "kept"}))
+    gateway.send((1, JOB_CANCEL, {}))
+    assert gateway.recv() == (2, True, "answer")
+    gateway.close()
+    thread.join(5)
+
+    assert finished == [{"user_message": "kept"}]
+
+
+def test_submit_before_start_raises_worker_crashed():
+    pool = WorkerPool(1)
+
+    async def main():
+        try:
+            await pool.submit(JOB_STATS)
+        except WorkerCrashed:
+            return True
+        return False
+
+    assert asyncio.run(main())
+
+
+def test_cancelled_submit_leaves_nothing_queued():
+    pool = WorkerPool(2)
+
+    async def main():
+        pool._loop = asyncio.get_running_loop()
+        task = asyncio.create_task(pool.submit(JOB_STATS, key=1))
+        await asyncio.sleep(0)
+        assert sum(w["backlog"] for w in pool.stats()) == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    assert all(w["backlog"] == 0 and w["inflight"] == 0 for w in pool.stats())
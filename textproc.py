@@ -0,0 +1,109 @@
+import re
+import unicodedata
+from typing import List, Optional
+
+# =========================
+# تطبيع النصوص (عربي + إنجليزي)
+# =========================
+
+# تشكيل + شدّة + ألف خنجرية
+_AR_DIACRITICS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]")
+_TATWEEL = "\u0640"
+_AR_CHAR_MAP = str.maketrans({
+    "أ": "ا",
+    "إ": "ا",
+    "آ": "ا",
+    "ٱ": "ا",
+    "ى": "ي",
+    "ئ": "ي",
+    "ؤ": "و",
+    "ة": "ه",
+    "٠": "0", "١": "1", "٢": "2", "٣": "3", "٤": "4",
+    "٥": "5", "٦": "6", "٧": "7", "٨": "8", "٩": "9",
+})
+_REPEATS = re.compile(r"(.)\1{2,}")
+_NON_WORD = re.compile(r"[^\w\s]", re.UNICODE)
+_SPACES = re.compile(r"\s+")
+
+_ARABIC_LETTER = re.compile("[\u0621-\u064a\u066e-\u06d3\u06fa-\u06ff]")
+_LATIN_LETTER = re.compile(r"[A-Za-z]")
+
+
+def normalize(text: str) -> str:
+    """
+    تطبيع للمقارنة:
+    - lowercase + NFKC
+    - شيل التشكيل والتطويل وتوحيد الألف/الياء/التاء المربوطة
+    - أي حرف متكرر 3 مرات أو أكتر يبقى حرف واحد (هلاااا → هلا، hiii → hi)
+    - شيل علامات الترقيم والإيموجي
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _AR_DIACRITICS.sub("", text).replace(_TATWEEL, "")
+    text = text.translate(_AR_CHAR_MAP)
+    text = _REPEATS.sub(r"\1", text)
+    text = _NON_WORD.sub(" ", text).replace("_", " ")
+    return _SPACES.sub(" ", text).strip()
+
+
+def detect_language(text: str, threshold: float = 0.6) -> Optional[str]:
+    """
+    يرجع "ar" أو "en" حسب نوع الحروف الغالب،
+    "mixed" لو مفيش لغة بتعدي threshold من الحروف،
+    أو None لو مفيش حروف خالص (إيموجي / أرقام بس).
+    """
+    ar = len(_ARABIC_LETTER.findall(text))
+    en = len(_LATIN_LETTER.findall(text))
+    total = ar + en
+    if total == 0:
+        return None
+    if ar / total >= threshold:
+        return "ar"
+    if en / total >= threshold:
+        return "en"
+    return "mixed"
+
+
+def dominant_language(text: str, default: str = "ar") -> str:
+    """
+    زي detect_language بس دايمًا يرجع "ar" أو "en" (للرد على اليوزر).
+    """
+    ar = len(_ARABIC_LETTER.findall(text))
+    en = len(_LATIN_LETTER.findall(text))
+    if ar == en:
+        return default
+    return "ar" if ar > en else "en"
+
+
+# كلمات وظيفية مالهاش وزن في معنى السؤال (بعد التطبيع)
+STOPWORDS = frozenset(normalize(w) for w in """
+how what which who whom whose where when why is are was were am be been do does did can could
+would should will shall may might i you we they he she it me my your our their a an the to of
+in on at for from with about by and or but if so please pls plz there this that these those
+any some tell know want need get give let us
+كيف كيفيه ازاي ازاى شلون وش ايش شو ايه اي ما ماذا هل هي هو هم انا انت انتم احنا نحن
+في على عن من الى الي مع او و ثم لو اذا يا ممكن ابي ابغى ابغي اريد عايز عاوز بدي
+لي ليا عندكم عندك هذا هذه ذلك تلك ده دي دا اللي الذي التي لو_سمحت سمحت فضلك رجاء
+""".split())
+
+
+# كلمات بتغيّر معنى السؤال رغم إنها stopwords: بتفضل في الكلمات المهمة
+# ("who is the founder" ≠ "where is the founder"، "hiring" ≠ "not hiring")
+INTERROGATIVES = frozenset(normalize(w) for w in """
+how what which who whom whose where when why
+كيف كيفيه ازاي ازاى شلون وش ايش شو ايه ماذا من مين فين وين اين متى امتى ليش ليه لماذا كم
+""".split())
+NEGATIONS = frozenset(normalize(w) for w in """
+not no never without dont doesnt didnt isnt arent wasnt cant cannot wont
+غير مش مو ما لا لم لن ليس بدون مفيش مافي
+""".split())
+KEY_WORDS = INTERROGATIVES | NEGATIONS
+
+
+def content_words(text: str) -> List[str]:
+    """
+    الكلمات اللي ليها معنى بعد التطبيع وشيل الـ stopwords، بنفس ترتيبها
+    (أدوات السؤال والنفي بتفضل). لو الرسالة كلها stopwords بنرجع الكلمات زي ما هي.
+    """
+    words = normalize(text).split()
+    content = [w for w in words if w not in STOPWORDS or w in KEY_WORDS]
+    return content or words
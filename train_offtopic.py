@@ -0,0 +1,142 @@
+"""
+تدريب وتقييم الـ off-topic classifier (offline).
+
+الاستخدام:
+    python train_offtopic.py --data labeled.jsonl --from-log ai_log.jsonl --out offtopic_model.json
+
+مصادر البيانات:
+    --data      JSONL فيه {"text": "...", "label": "on" | "off"}
+    --from-log  سجل البوت (ai_log.jsonl): الرسالة بتتعلّم "off" لو رد الموديل كان رفض،
+                و"on" غير كده. بناخد بس الرسائل اللي راحت للموديل من غير تاريخ محادثة.
+"""
+import argparse
+import json
+import random
+import time
+from typing import List, Tuple
+
+from offtopic import OffTopicClassifier, precision_recall
+from textproc import normalize
+
+# عبارات الرفض اللي الموديل بيستخدمها (بعد التطبيع)
+REFUSAL_MARKERS = [
+    "only for gp team",
+    "only help with",
+    "only answer questions about gp team",
+    "not related to gp team",
+    "outside what i can help",
+    "outside the scope",
+    "مخصص فقط",
+    "خارج نطاق",
+    "ليس له علاقه ب gp team",
+    "مش متعلق ب gp team",
+    "لا يمكنني المساعده في هذا",
+]
+_MARKERS = [normalize(m) for m in REFUSAL_MARKERS]
+
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.97, 0.99]
+
+
+def _parse_label(value) -> int:
+    if isinstance(value, str):
+        return 1 if value.lower() in ("off", "off_topic", "offtopic", "1", "true") else 0
+    return 1 if value else 0
+
+
+def load_labeled(path: str) -> List[Tuple[str, int]]:
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            rows.append((item["text"], _parse_label(item["label"])))
+    return rows
+
+
+def load_from_log(path: str) -> List[Tuple[str, int]]:
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if item.get("source") != "model" or item.get("history_len", 0):
+                continue
+            answer = normalize(item.get("answer", ""))
+            label = 1 if any(m in answer for m in _MARKERS) else 0
+            rows.append((item["question"], label))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the GP Team off-topic classifier")
+    parser.add_argument("--data", action="append", default=[], help="labeled JSONL (repeatable)")
+    parser.add_argument("--from-log", action="append", default=[], help="bot AI log JSONL (repeatable)")
+    parser.add_argument("--out", default="offtopic_model.json")
+    parser.add_argument("--eval-split", type=float, default=0.2)
+    parser.add_argument("--target-precision", type=float, default=0.97,
+                        help="أقل threshold يحقق الـ precision ده هو اللي بيتحفظ")
+    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    rows: List[Tuple[str, int]] = []
+    for path in args.data:
+        rows += load_labeled(path)
+    for path in args.from_log:
+        rows += load_from_log(path)
+
+    # نفس النص بعد التطبيع مرة واحدة بس (آخر label هو اللي بيكسب)
+    dedup = {}
+    for text, label in rows:
+        dedup[normalize(text)] = (text, label)
+    rows = list(dedup.values())
+
+    if len(rows) < 20:
+        raise SystemExit(f"⚠️ Not enough data to train ({len(rows)} examples).")
+
+    off = sum(label for _, label in rows)
+    print(f"Examples: {len(rows)}  (off-topic: {off}, GP Team: {len(rows) - off})")
+
+    rng = random.Random(args.seed)
+    rng.shuffle(rows)
+    split = int(len(rows) * (1 - args.eval_split))
+    train, test = rows[:split], rows[split:]
+
+    model = OffTopicClassifier.train(
+        [t for t, _ in train], [y for _, y in train], epochs=args.epochs, seed=args.seed
+    )
+
+    start = time.perf_counter()
+    probs = [model.predict_proba(t) for t, _ in test]
+    per_call_ms = (time.perf_counter() - start) * 1000 / max(1, len(test))
+    labels = [y for _, y in test]
+
+    print(f"\nEval on {len(test)} held-out examples (avg {per_call_ms:.3f} ms / prediction)")
+    print(f"{'threshold':>10} {'precision':>10} {'recall':>8} {'refused':>8}")
+    chosen = None
+    for th in THRESHOLDS:
+        p, r, cov = precision_recall(probs, labels, th)
+        print(f"{th:>10.2f} {p:>10.3f} {r:>8.3f} {cov:>8.1%}")
+        if chosen is None and p >= args.target_precision and r > 0:
+            chosen = th
+    if chosen is None:
+        chosen = THRESHOLDS[-1]
+        print(f"\n⚠️ No threshold reached precision {args.target_precision}; using {chosen}.")
+    else:
+        print(f"\nChosen threshold: {chosen} (precision ≥ {args.target_precision})")
+
+    # التدريب النهائي على كل البيانات
+    final = OffTopicClassifier.train(
+        [t for t, _ in rows], [y for _, y in rows],
+        epochs=args.epochs, threshold=chosen, seed=args.seed
+    )
+    final.save(args.out)
+    print(f"✅ Saved model to {args.out} ({len(final.weights)} weights)")
+
+
+if __name__ == "__main__":
+    main()
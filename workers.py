@@ -0,0 +1,490 @@
+"""
+AI worker processes: الـ gateway (bot.py) بيستقبل الأحداث ويبعت شغل الـ AI (AutoMod + الشات)
+لـ N process منفصلين، كل واحد ليه GIL و event loop و core بتاعه.
+
+- الاتصال: multiprocessing.connection على Unix socket (أو localhost على ويندوز) بـ authkey عشوائي
+- كل worker بيتشغل كـ `python workers.py --connect ...` → ما بيعملش import لـ bot.py ولا discord
+- الشات sticky: نفس (قناة، يوزر) دايمًا على نفس الـ worker عشان تاريخ المحادثة يفضل معاه
+- AutoMod بيروح لأقل worker عليه شغل
+- لو worker وقع: الـ gateway متصل بـ Discord عادي، الطلبات اللي كانت عنده بتتعاد مرة على
+  النسخة الجديدة (وبعدها بترجع رد الخطأ / SAFE) والـ worker بيتشغل تاني بـ backoff
+- طلب اتلغى أو عدّى الـ timeout في الـ gateway → رسالة JOB_CANCEL للـ worker بنفس الـ job_id
+  فالـ task بتتلغي هناك كمان (قبل ما تكتب في التاريخ أو الكاش)
+- قاعدة المعلومات: الـ gateway بس هو اللي بيبني الـ snapshot، والـ workers بيحمّلوه
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Dict, Hashable, List, Optional
+
+from executors import executor_stats
+from loopmon import start_loop_monitor
+from metrics import metrics_port, start_metrics_server
+
+AUTHKEY_ENV = "GP_WORKER_AUTHKEY"
+
+JOB_CHAT = "chat"
+JOB_MODERATE = "moderate"
+JOB_RESET = "reset"
+JOB_STATS = "stats"
+JOB_CANCEL = "cancel"
+
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+# =========================
+# جوه الـ worker process
+# =========================
+
+async def _run_job(core, kind: str, args: dict) -> Any:
+    if kind == JOB_CHAT:
+        return await core.ask_gp_team_ai(**args)
+    if kind == JOB_MODERATE:
+        return await core.ai_moderate_message(**args)
+    if kind == JOB_RESET:
+        await core.run_state(core.reset_history, **args)
+        return None
+    if kind == JOB_STATS:
+        return {
+            "pid": os.getpid(),
+            "cache": core.ANSWER_CACHE.stats.as_dict(),
+            "cache_entries": len(core.ANSWER_CACHE),
+            "routes": core.MODEL_ROUTER.stats(),
+            "knowledge": core.knowledge_status(),
+            "executors": executor_stats(),
+        }
+    raise ValueError(f"unknown job kind: {kind}")
+
+
+async def _worker_loop(index: int, conn: Connection, warmup: bool) -> None:
+    import core
+
+    loop = asyncio.get_running_loop()
+    jobs: asyncio.Queue = asyncio.Queue()
+    send_lock = threading.Lock()
+
+    def _reader():
+        # recv() بيبلوك → thread لوحده، والشغل نفسه على الـ event loop
+        try:
+            while True:
+                loop.call_soon_threadsafe(jobs.put_nowait, conn.recv())
+        except (EOFError, OSError):
+            loop.call_soon_threadsafe(jobs.put_nowait, None)
+
+    def _send(message: tuple) -> None:
+        with send_lock:
+            conn.send(message)
+
+    async def _handle(job_id: int, kind: str, args: dict) -> None:
+        try:
+            result = await _run_job(core, kind, args)
+            _send((job_id, True, result))
+        except Exception as e:
+            _send((job_id, False, f"{type(e).__name__}: {e}"))
+
+    # job_id -> الـ task الشغالة (عشان JOB_CANCEL)
+    tasks: Dict[int, asyncio.Task] = {}
+
+    threading.Thread(target=_reader, name="worker-reader", daemon=True).start()
+    # LOOP_MONITOR=1 → كل worker بيطبع الـ stalls بتاعته في اللوج
+    start_loop_monitor()
+    # كل worker ليه /metrics بتاعه: METRICS_PORT + 1 + index (الـ gateway على METRICS_PORT نفسه)
+    start_metrics_server(metrics_port(1 + index))
+    core.start_knowledge_watcher(core.KNOWLEDGE_WATCH_LOAD)
+    if warmup:
+        core.start_answer_cache_warmup()
+    print(f"[WORKER {index}] ready (pid {os.getpid()})")
+
+    while True:
+        job = await jobs.get()
+        if job is None:
+            break
+        job_id, kind, args = job
+        if kind == JOB_CANCEL:
+            # الـ gateway مش مستني النتيجة → ما نكتبش سؤال / رد قديم في التاريخ أو الكاش
+            task = tasks.get(job_id)
+            if task is not None:
+                task.cancel()
+            continue
+        task = tasks[job_id] = asyncio.create_task(_handle(job_id, kind, args))
+        task.add_done_callback(lambda t, job_id=job_id: tasks.pop(job_id, None))
+
+    # الـ gateway قفل → نخلّص اللي شغال (الردود مش هتوصل بس ما نقطعش طلبات Gemini في النص)
+    if tasks:
+        await asyncio.wait(list(tasks.values()), timeout=10)
+
+
+def worker_main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="GP Team AI worker (بيتشغل من WorkerPool)")
+    parser.add_argument("--connect", required=True)
+    parser.add_argument("--family", default="AF_UNIX")
+    parser.add_argument("--index", type=int, required=True)
+    parser.add_argument("--no-warmup", action="store_true")
+    args = parser.parse_args(argv)
+
+    authkey = bytes.fromhex(os.environ.pop(AUTHKEY_ENV, ""))
+    address: Any = args.connect
+    if args.family == "AF_INET":
+        host, port = args.connect.rsplit(":", 1)
+        address = (host, int(port))
+    conn = Client(address, family=args.family, authkey=authkey)
+    conn.send((args.index, os.getpid()))
+    try:
+        asyncio.run(_worker_loop(args.index, conn, warmup=not args.no_warmup))
+    finally:
+        conn.close()
+
+
+# =========================
+# في الـ gateway process
+# =========================
+
+@dataclass
+class _Job:
+    job_id: int
+    kind: str
+    args: dict
+    future: asyncio.Future
+    attempts: int = 0
+
+
+@dataclass
+class _Worker:
+    index: int
+    process: Optional[subprocess.Popen] = None
+    conn: Optional[Connection] = None
+    inflight: Dict[int, _Job] = field(default_factory=dict)
+    backlog: List[_Job] = field(default_factory=list)   # مستنيين الـ worker يتصل
+    started_at: float = 0.0
+    done: int = 0
+    failed: int = 0
+    restarts: int = 0
+    crash_streak: int = 0
+
+    def load(self) -> int:
+        return len(self.inflight) + len(self.backlog)
+
+
+class WorkerPool:
+    def __init__(
+        self,
+        size: int,
+        job_timeout: float = 180.0,
+        max_retries: int = 1,
+        restart_delay: float = 1.0,
+        max_restart_delay: float = 30.0,
+        warmup: bool = True,
+    ):
+        self.size = size
+        self.job_timeout = job_timeout
+        self.max_retries = max_retries       # كام مرة الطلب يتعاد لو الـ worker وقع وهو شغال عليه
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.warmup = warmup
+        self._workers = [_Worker(index=i) for i in range(size)]
+        self._ids = itertools.count(1)
+        self._rr = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[Listener] = None
+        self._family = "AF_UNIX" if hasattr(socket, "AF_UNIX") else "AF_INET"
+        self._authkey = b""
+        self._closing = False
+
+    # ---------- تشغيل / إيقاف ----------
+
+    async def start(self) -> None:
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._authkey = os.urandom(16)
+        self._listener = Listener(family=self._family, authkey=self._authkey)
+        threading.Thread(target=self._accept_loop, name="worker-accept", daemon=True).start()
+        for worker in self._workers:
+            self._spawn(worker)
+        print(f"🧵 AI worker pool: {self.size} processes")
+
+    def _spawn(self, worker: _Worker) -> None:
+        address = self._listener.address
+        if isinstance(address, tuple):
+            address = f"{address[0]}:{address[1]}"
+        cmd = [
+            sys.executable, os.path.abspath(__file__),
+            "--connect", address, "--family", self._family, "--index", str(worker.index),
+        ]
+        if not self.warmup:
+            cmd.append("--no-warmup")
+        env = dict(os.environ, **{AUTHKEY_ENV: self._authkey.hex()})
+        worker.process = subprocess.Popen(cmd, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+        worker.started_at = time.monotonic()
+        process = worker.process
+        threading.Thread(
+            target=self._wait_process, args=(worker, process), name=f"worker-{worker.index}-wait", daemon=True
+        ).start()
+
+    async def stop(self) -> None:
+        self._closing = True
+        for worker in self._workers:
+            if worker.conn is not None:
+                try:
+                    worker.conn.close()
+                except OSError:
+                    pass
+        for worker in self._workers:
+            if worker.process is not None and worker.process.poll() is None:
+                try:
+                    await asyncio.to_thread(worker.process.wait, 15)
+                except subprocess.TimeoutExpired:
+                    worker.process.kill()
+        if self._listener is not None:
+            self._listener.close()
+
+    # ---------- threads ----------
+
+    def _accept_loop(self) -> None:
+        while not self._closing:
+            try:
+                conn = self._listener.accept()
+                index, pid = conn.recv()
+            except (OSError, EOFError):
+                if self._closing:
+                    return
+                continue
+            except Exception as e:
+                # اتصال من برّه من غير الـ authkey الصح
+                print(f"[WORKERS] rejected connection: {e}")
+                continue
+            self._loop.call_soon_threadsafe(self._attach, index, pid, conn)
+
+    def _read_results(self, worker: _Worker, conn: Connection) -> None:
+        try:
+            while True:
+                job_id, ok, value = conn.recv()
+                self._loop.call_soon_threadsafe(self._resolve, worker, job_id, ok, value)
+        except (EOFError, OSError):
+            pass
+        # الاتصال اتقفل والـ process لسه عايشة (معلقة) → نقفلها، والـ wait thread يكمل
+        process = worker.process
+        if not self._closing and process is not None and process.poll() is None and worker.conn is conn:
+            process.kill()
+
+    def _wait_process(self, worker: _Worker, process: subprocess.Popen) -> None:
+        code = process.wait()
+        if not self._closing:
+            self._loop.call_soon_threadsafe(self._on_worker_exit, worker, process, code)
+
+    # ---------- على الـ event loop ----------
+
+    def _attach(self, index: int, pid: int, conn: Connection) -> None:
+        if not 0 <= index < self.size or self._workers[index].process is None:
+            conn.close()
+            return
+        worker = self._workers[index]
+        if worker.process.pid != pid:
+            # اتصال من نسخة قديمة اتقفلت
+            conn.close()
+            return
+        worker.conn = conn
+        threading.Thread(
+            target=self._read_results, args=(worker, conn), name=f"worker-{index}-read", daemon=True
+        ).start()
+        backlog, worker.backlog = worker.backlog, []
+        for job in backlog:
+            self._dispatch(worker, job)
+
+    def _on_worker_exit(self, worker: _Worker, process: subprocess.Popen, code: int) -> None:
+        if worker.process is not process:
+            return
+        if worker.conn is not None:
+            try:
+                worker.conn.close()
+            except OSError:
+                pass
+            worker.conn = None
+
+        lost = list(worker.inflight.values())
+        worker.inflight.clear()
+        retried = 0
+        for job in lost:
+            job.attempts += 1
+            if job.future.done():
+                continue
+            if job.attempts > self.max_retries:
+                worker.failed += 1
+                job.future.set_exception(WorkerCrashed(f"worker {worker.index} exited with code {code}"))
+            else:
+                worker.backlog.append(job)
+                retried += 1
+
+        # وقع بعد ما اشتغل شوية → مش crash loop
+        if time.monotonic() - worker.started_at > 60:
+            worker.crash_streak = 0
+        worker.crash_streak += 1
+        worker.restarts += 1
+        delay = min(self.restart_delay * 2 ** (worker.crash_streak - 1), self.max_restart_delay)
+        print(
+            f"[WORKERS] worker {worker.index} (pid {process.pid}) exited with code {code} — "
+            f"{len(lost)} in flight ({retried} retried), restarting in {delay:.0f}s"
+        )
+        self._loop.call_later(delay, self._respawn, worker, process)
+
+    def _respawn(self, worker: _Worker, old: subprocess.Popen) -> None:
+        if self._closing or worker.process is not old:
+            return
+        self._spawn(worker)
+
+    def _resolve(self, worker: _Worker, job_id: int, ok: bool, value: Any) -> None:
+        job = worker.inflight.pop(job_id, None)
+        if job is None or job.future.done():
+            return
+        if ok:
+            worker.done += 1
+            job.future.set_result(value)
+        else:
+            worker.failed += 1
+            job.future.set_exception(WorkerError(value))
+
+    def _dispatch(self, worker: _Worker, job: _Job) -> None:
+        if job.future.done():
+            return
+        if worker.conn is None:
+            worker.backlog.append(job)
+            return
+        worker.inflight[job.job_id] = job
+        try:
+            worker.conn.send((job.job_id, job.kind, job.args))
+        except (OSError, ValueError):
+            # الاتصال بيقع دلوقتي → _on_worker_exit هيعيده أو يفشّله
+            pass
+
+    def _cancel(self, worker: _Worker, job: _Job) -> None:
+        if job in worker.backlog:
+            worker.backlog.remove(job)
+        if worker.inflight.pop(job.job_id, None) is None or worker.conn is None:
+            return
+        try:
+            worker.conn.send((job.job_id, JOB_CANCEL, {}))
+        except (OSError, ValueError):
+            pass
+
+    def _pick(self, key: Optional[Hashable]) -> _Worker:
+        if key is not None:
+            return self._workers[hash(key) % self.size]
+        turn = next(self._rr)
+        return min(
+            self._workers,
+            key=lambda w: (w.load(), (w.index - turn) % self.size)
+        )
+
+    # ---------- API ----------
+
+    async def submit(self, kind: str, key: Optional[Hashable] = None, **args) -> Any:
+        """
+        يبعت job لـ worker ويستنى النتيجة.
+        key: أي قيمة hashable → نفس الـ key دايمًا على نفس الـ worker (تاريخ المحادثة).
+        بيرمي WorkerCrashed / WorkerError / asyncio.TimeoutError
+        (WorkerCrashed كمان لو الـ pool لسه ما اشتغلش أو اتقفل).
+        """
+        if self._loop is None or self._closing:
+            raise WorkerCrashed("worker pool is not running")
+        job = _Job(next(self._ids), kind, args, self._loop.create_future())
+        worker = self._pick(key)
+        self._dispatch(worker, job)
+        try:
+            return await asyncio.wait_for(job.future, self.job_timeout)
+        finally:
+            # timeout / cancel → ما نسيبش الـ job متعلق، والـ worker يلغيه عنده كمان
+            # (wait_for بيلغي الـ future نفسه، فـ cancelled() معناها إن النتيجة ما وصلتش)
+            if job.future.cancelled() or not job.future.done():
+                job.future.cancel()
+                self._cancel(worker, job)
+
+    async def ask_gp_team_ai(
+        self,
+        user_message: str,
+        channel_id: int,
+        user_id: int,
+        priority_class: str = "default"
+    ) -> str:
+        from core import AI_ERROR_REPLY
+
+        try:
+            return await self.submit(
+                JOB_CHAT,
+                key=(channel_id, user_id),
+                user_message=user_message,
+                channel_id=channel_id,
+                user_id=user_id,
+                priority_class=priority_class,
+            )
+        except (WorkerCrashed, WorkerError, asyncio.TimeoutError) as e:
+            print(f"[WORKERS] chat failed: {e!r}")
+            return AI_ERROR_REPLY
+
+    async def ai_moderate_message(self, content: str, priority_class: str = "default") -> dict:
+        from core import SAFE_MODERATION_RESULT
+
+        try:
+            return await self.submit(JOB_MODERATE, content=content, priority_class=priority_class)
+        except (WorkerCrashed, WorkerError, asyncio.TimeoutError) as e:
+            print(f"[WORKERS] moderation failed: {e!r}")
+            return dict(SAFE_MODERATION_RESULT)
+
+    def reset_history(self, channel_id: int, user_id: int) -> None:
+        async def _reset():
+            try:
+                await self.submit(JOB_RESET, key=(channel_id, user_id), channel_id=channel_id, user_id=user_id)
+            except (WorkerCrashed, WorkerError, asyncio.TimeoutError) as e:
+                print(f"[WORKERS] reset failed: {e!r}")
+
+        asyncio.get_running_loop().create_task(_reset())
+
+    async def worker_stats(self, timeout: float = 5.0) -> List[Optional[dict]]:
+        """
+        إحصائيات core من كل worker (None للي ما ردش).
+        """
+        async def _one(index: int) -> Optional[dict]:
+            worker = self._workers[index]
+            if worker.conn is None:
+                return None
+            job = _Job(next(self._ids), JOB_STATS, {}, self._loop.create_future())
+            self._dispatch(worker, job)
+            try:
+                return await asyncio.wait_for(job.future, timeout)
+            except (WorkerCrashed, WorkerError, asyncio.TimeoutError):
+                worker.inflight.pop(job.job_id, None)
+                return None
+
+        return list(await asyncio.gather(*(_one(i) for i in range(self.size))))
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "index": w.index,
+                "pid": w.process.pid if w.process is not None else None,
+                "connected": w.conn is not None,
+                "inflight": len(w.inflight),
+                "backlog": len(w.backlog),
+                "done": w.done,
+                "failed": w.failed,
+                "restarts": w.restarts,
+            }
+            for w in self._workers
+        ]
+
+
+if __name__ == "__main__":
+    worker_main()